@@ -1,10 +1,25 @@
 import os
+import io
+import csv
 import json
+import zlib
 import subprocess
-from scrapy.crawler import CrawlerProcess
-from nvd_scraper.spiders.nvd_spider import NVDSpider
+import sys
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from nvd_scraper import responses, storage
+from nvd_scraper.broadcast import Broadcaster
+from nvd_scraper.profiling import Profiler, profile_directory, profiling_enabled, section
+from nvd_scraper.registry import run_crawl
+from nvd_scraper.responses import ResponseCache
+from nvd_scraper.snapshot import SnapshotReader, upload_snapshot, write_snapshot
+from nvd_scraper.versions import IntervalIndex, normalize_product, version_key
+from gridfs import GridFSBucket
 from pymongo import MongoClient, errors
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from multiprocessing import Process
 
 app = Flask(__name__)
@@ -12,12 +27,57 @@ app = Flask(__name__)
 url = os.getenv('MONGODB_URL', 'private')
 db_name = os.getenv('DB_NAME', 'private')
 collection_name = os.getenv('COLLECTION_NAME', 'private')
+advisory_collection_name = os.getenv('ADVISORY_COLLECTION_NAME', 'advisories')
+range_collection_name = os.getenv('RANGE_COLLECTION_NAME', 'product_ranges')
+meta_collection_name = os.getenv('META_COLLECTION_NAME', 'dataset_meta')
+stats_collection_name = os.getenv('STATS_COLLECTION_NAME', 'vulnerability_stats')
+# Read snapshot published to GridFS after every ingest, downloaded once per generation
+# into this instance's SNAPSHOT_DIR and served without a database round trip
+snapshot_dir = os.getenv('SNAPSHOT_DIR', os.path.join(tempfile.gettempdir(), 'nvd-snapshot'))
+SNAPSHOT_BUCKET = 'snapshots'
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 5000
+
+TOP_DAYS = 30
+TOP_MAX_DAYS = 3650
+TOP_K = 10
+TOP_MAX_K = 100
+
+# Documents buffered per stream client before the oldest ones are dropped
+STREAM_BUFFER_SIZE = int(os.getenv('STREAM_BUFFER_SIZE', 100))
+STREAM_HEARTBEAT = 15
+# How often each worker polls the change feed for documents to stream
+STREAM_POLL_INTERVAL = float(os.getenv('STREAM_POLL_INTERVAL', 1))
+
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 256))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 300))
+# How long a worker trusts its last read of the dataset generation
+GENERATION_CHECK_INTERVAL = float(os.getenv('GENERATION_CHECK_INTERVAL', 5))
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_FIELDS = ['cve_id', 'published_date', 'description', 'org_link', 'release_date',
+                 'severity', 'summary', 'affected_products', 'recommendations', 'ingested_at',
+                 'cvss_score', 'cvss_vector', 'severity_level']
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+VULNERABILITIES_LIMIT = 1000
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+broadcaster = Broadcaster(STREAM_BUFFER_SIZE)
+# One change feed follower per worker feeds its broadcaster, whichever worker ran the scrape
+_stream_relay = {'thread': None, 'stop': None, 'lock': threading.Lock()}
+# Per-product interval indexes, rebuilt when the dataset generation changes
+range_index_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+_generation = {'value': None, 'checked_at': 0.0}
+snapshot_reader = SnapshotReader(snapshot_dir, GENERATION_CHECK_INTERVAL)
 #
 def run_first_level_scraping():
     """Run the first level of scraping to generate the JSON file with links."""
-    process = CrawlerProcess()
-    process.crawl(NVDSpider)
-    process.start()
+    run_crawl('nvd_spider')
 
 def run_second_level_scraping():
     """Run the second level of scraping by calling another Python script."""
@@ -65,41 +125,216 @@ def combine_json_files(output_file, *input_files):
     return combined_data
 
 def insert_many_vulnerabilities(vulnerabilities):
-    """Insert many documents into MongoDB with duplicate handling."""
+    """Store scraped items as deduplicated advisories plus per-CVE references.
+
+    Returns whether the ingest succeeded.
+    """
     client = MongoClient(url)
     db = client[db_name]
-    collection = db[collection_name]
 
     try:
-        result = collection.insert_many(vulnerabilities, ordered=False)
-        print(f'{len(result.inserted_ids)} documents were inserted successfully')
+        storage.ensure_indexes(db[collection_name], db[advisory_collection_name], db[range_collection_name])
+        advisories_written, written = storage.ingest(
+            db[collection_name], db[advisory_collection_name], db[range_collection_name],
+            db[meta_collection_name], db[stats_collection_name], vulnerabilities
+        )
+        print(f'{advisories_written} advisories and {len(written)} CVE references were written, '
+              f'the rest were unchanged')
+        return True
     except errors.BulkWriteError as bwe:
         for error in bwe.details['writeErrors']:
-            if error['code'] == 11000:  # Duplicate key error code
-                print(f'Duplicate found and skipped: {error["errmsg"]}')
-            else:
-                print(f'Error: {error["errmsg"]}')
+            print(f'Error: {error["errmsg"]}')
     except Exception as e:
         print(f'An error occurred: {e}')
     finally:
         client.close()
+    return False
+
+def bump_generation():
+    """Advance the dataset generation so responses cached before this ingest are no longer served."""
+    client = MongoClient(url)
+    try:
+        client[db_name][meta_collection_name].update_one(
+            {'_id': 'dataset'}, {'$inc': {'generation': 1}}, upsert=True
+        )
+    except Exception as e:
+        print(f'Could not advance the dataset generation: {e}')
+    finally:
+        client.close()
+
+def publish_snapshot():
+    """Write the joined dataset to a new read snapshot of the current generation and publish it to GridFS."""
+    client = MongoClient(url)
+    db = client[db_name]
+    try:
+        generation = (db[meta_collection_name].find_one({'_id': 'dataset'}) or {}).get('generation', 0)
+        cursor = db[collection_name].find({}, {'_id': 0}).batch_size(EXPORT_BATCH_SIZE)
+        docs = storage.iter_joined(db[advisory_collection_name], cursor, EXPORT_BATCH_SIZE)
+        name = write_snapshot(snapshot_dir, docs, generation)
+        upload_snapshot(GridFSBucket(db, SNAPSHOT_BUCKET), db[meta_collection_name], snapshot_dir, name, generation)
+        print(f'Published snapshot {name} of generation {generation}')
+    except Exception as e:
+        print(f'Could not publish a snapshot, reads use MongoDB until the next one: {e}')
+    finally:
+        client.close()
+
+def current_snapshot(generation):
+    """The published snapshot of this dataset generation, or None when reads must use MongoDB."""
+    if generation is None:
+        return None
+    snapshot = snapshot_reader.current(generation)
+    if snapshot is not None or not snapshot_reader.due(generation):
+        return snapshot
+    client = MongoClient(url)
+    db = client[db_name]
+    try:
+        return snapshot_reader.load(GridFSBucket(db, SNAPSHOT_BUCKET), db[meta_collection_name], generation)
+    except Exception as e:
+        print(f'Could not load the published snapshot, reading MongoDB: {e}')
+        return None
+    finally:
+        client.close()
+
+def snapshot_response(snapshot, chunks):
+    """Serve documents sliced from the mapped snapshot, negotiated and cached like the other reads.
+
+    WSGI servers only accept bytes, so the slices are joined into one body; every
+    coding of it stays in the response cache for as long as the snapshot is current.
+    """
+    return responses.cached_response(
+        app.response_class, app.json.mimetype, response_cache, cache_key(snapshot.name),
+        responses.negotiate_encoding(request.accept_encodings), request.if_none_match, lambda: b''.join(chunks)
+    )
+
+def current_generation():
+    """Return the dataset generation, re-reading it from MongoDB at most every few seconds."""
+    now = time.monotonic()
+    if _generation['value'] is not None and now - _generation['checked_at'] < GENERATION_CHECK_INTERVAL:
+        return _generation['value']
+
+    client = MongoClient(url)
+    try:
+        doc = client[db_name][meta_collection_name].find_one({'_id': 'dataset'})
+        _generation['value'] = doc['generation'] if doc else 0
+        _generation['checked_at'] = now
+    except errors.PyMongoError as e:
+        print(f'Could not read the dataset generation, bypassing the response cache: {e}')
+        return None
+    finally:
+        client.close()
+    return _generation['value']
+
+def cache_key(generation):
+    return responses.cache_key(generation, request.path, request.args)
+
+def cached_json_response(build):
+    """Serve the JSON document produced by build() from the response cache when possible.
+
+    The ETag only depends on the dataset generation, the request and the negotiated
+    coding, so a matching If-None-Match is answered with 304 before MongoDB is queried.
+    """
+    generation = current_generation()
+    preferred = responses.negotiate_encoding(request.accept_encodings)
+    if generation is None:
+        variants = {'identity': (app.json.dumps(build()).encode('utf-8'), 'identity')}
+        return responses.encoded_response(app.response_class, app.json.mimetype, variants, preferred, None)
+    return responses.cached_response(
+        app.response_class, app.json.mimetype, response_cache, cache_key(generation), preferred,
+        request.if_none_match, lambda: app.json.dumps(build()).encode('utf-8')
+    )
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def export_chunks(cursor, fmt):
+    """Serialize a cursor into NDJSON or CSV text, one chunk per batch of documents."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(EXPORT_FIELDS)
+
+    count = 0
+    for doc in cursor:
+        if fmt == 'csv':
+            writer.writerow([
+                '; '.join(value) if isinstance(value, list) else export_value(value)
+                for value in (doc.get(field) for field in EXPORT_FIELDS)
+            ])
+        else:
+            buffer.write(json.dumps({k: export_value(v) for k, v in doc.items()}))
+            buffer.write('\n')
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def gzip_chunks(chunks):
+    """Compress a stream of text chunks into a single gzip member as they are produced."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def load_range_index(db, product_key):
+    """Return the interval index of a product's affected version ranges."""
+    generation = current_generation()
+    key = (generation, product_key)
+    index = range_index_cache.get(key) if generation is not None else None
+    if index is None:
+        docs = db[range_collection_name].find({'product_key': product_key}, {'_id': 0})
+        index = IntervalIndex((doc['lo_key'], doc['hi_key'], doc) for doc in docs)
+        if generation is not None:
+            range_index_cache.set(key, index)
+    return index
 
 def run_full_scraper():
     """Run the full scraping process and insert data into MongoDB."""
     os.makedirs('data', exist_ok=True)
-    run_first_level_scraping()
-    run_second_level_scraping()
-    
-    ibm_file = 'data/ibm_vulnerabilities_output.json'
-    qnap_file = 'data/qnap_advisories_output.json'
-    wordfence_file = 'data/wordfence_vulnerabilities_output.json'
-    microsoft_file='data/microsoft_vulnerabilities_output.json'
-    cisco_file='data/cisco_advisories_output.json'
-    firefox_file='data/mozilla_security_advisory_output.json'
-    adobe_file='data/adobe_security_advisory_output.json'
-    combined_data = combine_json_files('data/vulnerabilities_output.json', ibm_file, qnap_file, wordfence_file, microsoft_file, cisco_file, firefox_file, adobe_file)
-    
-    insert_many_vulnerabilities(combined_data)
+    budget = os.getenv('RUN_BUDGET')
+    if budget and not os.getenv('RUN_DEADLINE'):
+        # One deadline for every crawl of this run, the second level subprocess inherits it
+        os.environ['RUN_DEADLINE'] = str(time.time() + float(budget))
+    # Off unless SCRAPER_PROFILE=1; the crawl subprocess inherits the variable and the run directory
+    profiler = Profiler('orchestration', profile_directory()) if profiling_enabled() else None
+    if profiler:
+        profiler.start()
+    try:
+        with section(profiler, 'first_level_scraping'):
+            run_first_level_scraping()
+        with section(profiler, 'second_level_scraping'):
+            run_second_level_scraping()
+
+        ibm_file = 'data/ibm_vulnerabilities_output.json'
+        qnap_file = 'data/qnap_advisories_output.json'
+        wordfence_file = 'data/wordfence_vulnerabilities_output.json'
+        microsoft_file='data/microsoft_vulnerabilities_output.json'
+        cisco_file='data/cisco_advisories_output.json'
+        firefox_file='data/mozilla_security_advisory_output.json'
+        adobe_file='data/adobe_security_advisory_output.json'
+        with section(profiler, 'combine_json_files'):
+            combined_data = combine_json_files('data/vulnerabilities_output.json', ibm_file, qnap_file, wordfence_file, microsoft_file, cisco_file, firefox_file, adobe_file)
+
+        with section(profiler, 'insert_many_vulnerabilities'):
+            ingested = insert_many_vulnerabilities(combined_data)
+        # A failed ingest changed nothing, so cached responses and the snapshot stay valid
+        if ingested:
+            with section(profiler, 'bump_generation'):
+                bump_generation()
+            with section(profiler, 'publish_snapshot'):
+                publish_snapshot()
+    finally:
+        if profiler:
+            profiler.stop()
+            profiler.dump()
+            for label, seconds in profiler.summary():
+                print(f"[profile] orchestration.{label}: {seconds:.3f}s")
     return len(combined_data)
 
 def run_scraper_in_background():
@@ -119,17 +354,331 @@ def trigger_scraper():
 
 @app.route('/get_vulnerabilities', methods=['GET'])
 def get_vulnerabilities():
+    vendor = request.args.get('vendor', '').strip() or None
+
+    snapshot = current_snapshot(current_generation())
+    if snapshot is not None:
+        first, count = 0, len(snapshot)
+        if vendor:
+            first, count = snapshot.vendor_range(vendor) or (0, 0)
+        return snapshot_response(snapshot, snapshot.documents(first, min(count, VULNERABILITIES_LIMIT)))
+
+    def build():
+        client = MongoClient(url)
+        db = client[db_name]
+        try:
+            criteria = {}
+            if vendor:
+                advisory_ids = db[advisory_collection_name].distinct('_id', {'description': vendor})
+                criteria = {'$or': [{'advisory_id': {'$in': advisory_ids}}, {'description': vendor}]}
+            refs = list(db[collection_name].find(criteria, {'_id': 0}).limit(VULNERABILITIES_LIMIT))
+            return storage.join(db[advisory_collection_name], refs)
+        finally:
+            client.close()
+
+    try:
+        return cached_json_response(build)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/vulnerability/<cve_id>', methods=['GET'])
+def get_vulnerability(cve_id):
+    snapshot = current_snapshot(current_generation())
+    if snapshot is not None:
+        document = snapshot.document(cve_id)
+        if document is None:
+            return jsonify({"error": f"{cve_id} was not found."}), 404
+        return snapshot_response(snapshot, [document])
+
+    client = MongoClient(url)
+    db = client[db_name]
+    try:
+        ref = db[collection_name].find_one({'cve_id': cve_id}, {'_id': 0})
+        if ref is None:
+            return jsonify({"error": f"{cve_id} was not found."}), 404
+        return jsonify(storage.join(db[advisory_collection_name], [ref])[0])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        client.close()
+
+@app.route('/search', methods=['GET'])
+def search_vulnerabilities():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query parameter 'q'."}), 400
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "'page' and 'per_page' must be integers."}), 400
+
+    def build():
+        client = MongoClient(url)
+        db = client[db_name]
+        try:
+            # Quoted terms ("Fix Central") are matched as phrases by the text index
+            results, has_more = storage.search(
+                db[collection_name], db[advisory_collection_name], query, (page - 1) * per_page, per_page
+            )
+            return {
+                "query": query,
+                "page": page,
+                "per_page": per_page,
+                "results": results,
+                "has_more": has_more
+            }
+        finally:
+            client.close()
+
+    try:
+        return cached_json_response(build)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/export', methods=['GET'])
+def export_vulnerabilities():
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format '{fmt}', use one of: {', '.join(EXPORT_FORMATS)}."}), 400
+
+    criteria = {}
+    since = request.args.get('since')
+    if since:
+        try:
+            criteria['ingested_at'] = {'$gt': datetime.fromisoformat(since)}
+        except ValueError:
+            return jsonify({"error": "'since' must be an ISO 8601 date or datetime."}), 400
+
+    compress = request.args.get('gzip') == '1' or bool(request.accept_encodings['gzip'])
+
+    def generate():
+        client = MongoClient(url)
+        db = client[db_name]
+        try:
+            # The server-side cursor keeps only one batch in memory at a time
+            cursor = db[collection_name].find(criteria, {'_id': 0}, batch_size=EXPORT_BATCH_SIZE).sort('ingested_at', 1)
+            docs = storage.iter_joined(db[advisory_collection_name], cursor, EXPORT_BATCH_SIZE)
+            chunks = export_chunks(docs, fmt)
+            yield from gzip_chunks(chunks) if compress else (chunk.encode('utf-8') for chunk in chunks)
+        finally:
+            client.close()
+
+    response = Response(generate(), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=vulnerabilities.{fmt}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@app.route('/changes', methods=['GET'])
+def get_changes():
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(max(int(request.args.get('limit', CHANGES_PAGE_SIZE)), 1), CHANGES_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "'since' must be a token returned by this endpoint and 'limit' an integer."}), 400
+
+    def build():
+        client = MongoClient(url)
+        db = client[db_name]
+        try:
+            committed = storage.committed_sequence(db[meta_collection_name].find_one({'_id': 'change_sequence'}))
+            # Fetch one extra reference to know whether another page follows
+            refs = list(
+                db[collection_name].find({'seq': {'$gt': since, '$lte': committed}}, {'_id': 0})
+                .sort('seq', 1)
+                .limit(limit + 1)
+            )
+            has_more = len(refs) > limit
+            refs = refs[:limit]
+            return {
+                "changes": storage.join(db[advisory_collection_name], refs),
+                "next": str(refs[-1]['seq']) if refs else str(since),
+                "has_more": has_more
+            }
+        finally:
+            client.close()
+
+    try:
+        return cached_json_response(build)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def publish_changes(since):
+    """Publish the changes committed after `since` to this worker's stream subscribers.
+
+    Returns the position to continue from; None starts at the current head, so a
+    worker only streams what is ingested after it began following the feed.
+    """
+    client = MongoClient(url)
+    db = client[db_name]
+    try:
+        committed = storage.committed_sequence(db[meta_collection_name].find_one({'_id': 'change_sequence'}))
+        if since is None:
+            return committed
+        while since < committed:
+            refs = list(
+                db[collection_name].find({'seq': {'$gt': since, '$lte': committed}}, {'_id': 0})
+                .sort('seq', 1)
+                .limit(CHANGES_MAX_PAGE_SIZE)
+            )
+            for doc in storage.join(db[advisory_collection_name], refs):
+                broadcaster.publish(doc)
+            if len(refs) < CHANGES_MAX_PAGE_SIZE:
+                break
+            since = refs[-1]['seq']
+        return committed
+    finally:
+        client.close()
+
+def follow_changes(stop):
+    """Poll the change feed and fan every committed change out to this worker's subscribers."""
+    since = None
+    while not stop.is_set():
+        try:
+            since = publish_changes(since)
+        except Exception as e:
+            print(f'Could not read the change feed for /stream: {e}')
+        stop.wait(STREAM_POLL_INTERVAL)
+
+def ensure_stream_relay():
+    """Start this worker's change feed follower the first time a client subscribes to /stream."""
+    with _stream_relay['lock']:
+        if _stream_relay['thread'] is None:
+            _stream_relay['stop'] = threading.Event()
+            _stream_relay['thread'] = threading.Thread(
+                target=follow_changes, args=(_stream_relay['stop'],), name='stream-relay', daemon=True
+            )
+            _stream_relay['thread'].start()
+
+@app.route('/stream', methods=['GET'])
+def stream_vulnerabilities():
+    """Server-sent events for documents ingested by any scrape, read from the change feed."""
+    subscription = broadcaster.subscribe(request.args.getlist('vendor'), request.args.getlist('severity'))
+    ensure_stream_relay()
+
+    def generate():
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    doc = subscription.queue.get(timeout=STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if subscription.dropped:
+                    yield f'event: dropped\ndata: {subscription.dropped}\n\n'
+                    subscription.dropped = 0
+                yield f"id: {doc.get('seq', '')}\nevent: vulnerability\ndata: {app.json.dumps(doc)}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/affected', methods=['GET'])
+def affected_by_version():
+    product = request.args.get('product', '').strip()
+    version = request.args.get('version', '').strip()
+    key = version_key(version)
+    if not product or key is None:
+        return jsonify({"error": "Both 'product' and a numeric 'version' are required."}), 400
+
+    def build():
+        client = MongoClient(url)
+        db = client[db_name]
+        try:
+            matches = load_range_index(db, normalize_product(product)).stab(key)
+            advisory_ids = list({match['advisory_id'] for match in matches})
+            cve_ids = {}
+            for ref in db[collection_name].find({'advisory_id': {'$in': advisory_ids}}, {'_id': 0, 'cve_id': 1, 'advisory_id': 1}):
+                cve_ids.setdefault(ref['advisory_id'], []).append(ref['cve_id'])
+            return {
+                "product": product,
+                "version": version,
+                "affected": [
+                    {
+                        "vendor": match['vendor'],
+                        "product": match['product'],
+                        "introduced": match['introduced'],
+                        "fixed": match['fixed'],
+                        "last_affected": match['last_affected'],
+                        "cve_ids": sorted(cve_ids.get(match['advisory_id'], []))
+                    }
+                    for match in matches
+                ]
+            }
+        finally:
+            client.close()
+
+    try:
+        return cached_json_response(build)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/top', methods=['GET'])
+def top_vulnerabilities():
+    try:
+        days = min(max(int(request.args.get('days', TOP_DAYS)), 1), TOP_MAX_DAYS)
+        k = min(max(int(request.args.get('k', TOP_K)), 1), TOP_MAX_K)
+    except ValueError:
+        return jsonify({"error": "'days' and 'k' must be integers."}), 400
+
+    def build():
+        client = MongoClient(url)
+        try:
+            since = datetime.utcnow() - timedelta(days=days)
+            return {
+                "days": days,
+                "k": k,
+                "results": storage.top_severe(client[db_name][collection_name], since, k)
+            }
+        finally:
+            client.close()
+
+    try:
+        return cached_json_response(build)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    vendor = request.args.get('vendor', '').strip() or None
+    severity = request.args.get('severity', '').strip() or None
+
+    def build():
+        client = MongoClient(url)
+        try:
+            # Rollups are maintained at ingest, so this never touches the CVE collection
+            return storage.read_stats(client[db_name][stats_collection_name], vendor, severity)
+        finally:
+            client.close()
+
+    try:
+        return cached_json_response(build)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/stats/rebuild', methods=['POST'])
+def rebuild_stats():
+    """Recount the rollups from scratch and report the ones that had drifted."""
     client = MongoClient(url)
     db = client[db_name]
-    collection = db[collection_name]
-    
     try:
-        vulnerabilities = list(collection.find({}, {'_id': 0}).limit(1000)) 
-        return jsonify(vulnerabilities)
+        rollups, mismatches = storage.rebuild_stats(
+            db[collection_name], db[advisory_collection_name], db[stats_collection_name], EXPORT_BATCH_SIZE
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         client.close()
+    bump_generation()
+    return jsonify({"rollups": rollups, "mismatches": mismatches})
 
 if __name__ == '__main__':
+    if '--profile' in sys.argv:
+        os.environ['SCRAPER_PROFILE'] = '1'
     app.run(debug=True)
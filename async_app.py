@@ -0,0 +1,265 @@
+"""Asyncio serving mode for the read endpoints, on Quart and motor.
+
+    pip install -r requirements-async.txt
+    hypercorn async_app:app --workers 4 --bind 0.0.0.0:8000
+
+Under gunicorn every slow MongoDB query holds a whole sync worker. Here each
+worker multiplexes its requests over one shared motor connection pool, so a
+handful of processes can keep thousands of readers waiting on the database.
+
+Each request gets a deadline (504 past it, with the MongoDB side cut off by
+maxTimeMS), and at most MAX_CONCURRENT_QUERIES requests per worker query
+MongoDB at once. A request that cannot get a slot within QUEUE_TIMEOUT is
+answered with 503 and Retry-After instead of queueing without bound.
+
+Scraping, /search, /export, /stream, /affected and /top stay on the Flask app.
+"""
+import asyncio
+import functools
+import os
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from quart import Quart, jsonify, request
+
+import app as sync_app
+from nvd_scraper import responses, storage
+
+app = Quart(__name__)
+
+REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', 10))
+MAX_CONCURRENT_QUERIES = int(os.getenv('MAX_CONCURRENT_QUERIES', 64))
+QUEUE_TIMEOUT = float(os.getenv('QUEUE_TIMEOUT', 2))
+MONGO_POOL_SIZE = int(os.getenv('MONGO_POOL_SIZE', MAX_CONCURRENT_QUERIES))
+
+_mongo = {'client': None}
+_slots = {'semaphore': None}
+_generation = {'value': None, 'checked_at': 0.0}
+# Identical requests that miss the cache wait on one query instead of running their own
+_inflight = {}
+
+
+class Saturated(Exception):
+    pass
+
+
+@app.before_serving
+async def open_client():
+    _mongo['client'] = AsyncIOMotorClient(sync_app.url, maxPoolSize=MONGO_POOL_SIZE)
+    _slots['semaphore'] = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+
+@app.after_serving
+async def close_client():
+    _mongo['client'].close()
+
+
+def db():
+    return _mongo['client'][sync_app.db_name]
+
+
+def query_time_ms():
+    return int(REQUEST_TIMEOUT * 1000)
+
+
+def read_endpoint(handler):
+    """Run a handler under the per-worker query limit and the request deadline."""
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await asyncio.wait_for(handler(*args, **kwargs), REQUEST_TIMEOUT)
+        except Saturated:
+            response = jsonify({"error": "The server is busy, retry shortly."})
+            response.headers['Retry-After'] = str(max(int(QUEUE_TIMEOUT), 1))
+            return response, 503
+        except asyncio.TimeoutError:
+            return jsonify({"error": f"The request did not complete within {REQUEST_TIMEOUT:g}s."}), 504
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    return wrapper
+
+
+async def run_query(build):
+    """Await build() once a query slot is free, or raise Saturated."""
+    semaphore = _slots['semaphore']
+    try:
+        await asyncio.wait_for(semaphore.acquire(), QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise Saturated()
+    try:
+        return await build()
+    finally:
+        semaphore.release()
+
+
+async def join(refs):
+    """storage.join on motor: one advisory query per batch of references."""
+    ids = storage.advisory_ids(refs)
+    by_id = {}
+    if ids:
+        async for doc in db()[sync_app.advisory_collection_name].find({'_id': {'$in': ids}}, max_time_ms=query_time_ms()):
+            by_id[doc['_id']] = doc
+    return [storage.merge(ref, by_id.get(ref.get('advisory_id'))) for ref in refs]
+
+
+async def current_generation():
+    """Return the dataset generation, re-reading it from MongoDB at most every few seconds."""
+    now = time.monotonic()
+    if _generation['value'] is not None and now - _generation['checked_at'] < sync_app.GENERATION_CHECK_INTERVAL:
+        return _generation['value']
+    try:
+        doc = await db()[sync_app.meta_collection_name].find_one({'_id': 'dataset'}, max_time_ms=query_time_ms())
+    except Exception as e:
+        print(f'Could not read the dataset generation, bypassing the response cache: {e}')
+        return None
+    _generation['value'] = doc['generation'] if doc else 0
+    _generation['checked_at'] = now
+    return _generation['value']
+
+
+async def current_snapshot():
+    """The published snapshot of the current generation; a missing one is fetched off the event loop."""
+    generation = await current_generation()
+    snapshot = sync_app.snapshot_reader.current(generation)
+    if snapshot is None and generation is not None and sync_app.snapshot_reader.due(generation):
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, sync_app.current_snapshot, generation)
+    return snapshot
+
+
+def cache_key(generation):
+    return responses.cache_key(generation, request.path, request.args)
+
+
+async def cached_json_response(build):
+    """The async counterpart of app.cached_json_response, sharing its cache and ETag scheme."""
+    generation = await current_generation()
+    key = cache_key(generation)
+    preferred = responses.negotiate_encoding(request.accept_encodings)
+
+    etag = None
+    if generation is not None:
+        etag = responses.make_etag(key, preferred)
+        if request.if_none_match.contains(etag):
+            return responses.not_modified(app.response_class, etag)
+
+    variants = sync_app.response_cache.get(key) if generation is not None else None
+    if variants is None:
+        if generation is None:
+            document = await run_query(build)
+        else:
+            task = _inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(run_query(build))
+                _inflight[key] = task
+                task.add_done_callback(lambda _: _inflight.pop(key, None))
+            # A waiter hitting its deadline must not cancel the query for the others
+            document = await asyncio.shield(task)
+        variants = {'identity': (app.json.dumps(document).encode('utf-8'), 'identity')}
+        if generation is not None:
+            sync_app.response_cache.set(key, variants)
+    return responses.encoded_response(app.response_class, app.json.mimetype, variants, preferred, etag)
+
+
+def snapshot_response(snapshot, chunks):
+    """Serve a slice of the mapped snapshot, with the same codings, cache and ETags as the sync app."""
+    return responses.cached_response(
+        app.response_class, app.json.mimetype, sync_app.response_cache, cache_key(snapshot.name),
+        responses.negotiate_encoding(request.accept_encodings), request.if_none_match, lambda: b''.join(chunks)
+    )
+
+
+@app.route('/get_vulnerabilities', methods=['GET'])
+@read_endpoint
+async def get_vulnerabilities():
+    vendor = request.args.get('vendor', '').strip() or None
+
+    snapshot = await current_snapshot()
+    if snapshot is not None:
+        first, count = 0, len(snapshot)
+        if vendor:
+            first, count = snapshot.vendor_range(vendor) or (0, 0)
+        return snapshot_response(snapshot, snapshot.documents(first, min(count, sync_app.VULNERABILITIES_LIMIT)))
+
+    async def build():
+        criteria = {}
+        if vendor:
+            advisory_ids = await db()[sync_app.advisory_collection_name].distinct(
+                '_id', {'description': vendor}, maxTimeMS=query_time_ms()
+            )
+            criteria = {'$or': [{'advisory_id': {'$in': advisory_ids}}, {'description': vendor}]}
+        cursor = db()[sync_app.collection_name].find(criteria, {'_id': 0}, max_time_ms=query_time_ms())
+        refs = await cursor.to_list(sync_app.VULNERABILITIES_LIMIT)
+        return await join(refs)
+
+    return await cached_json_response(build)
+
+
+@app.route('/vulnerability/<cve_id>', methods=['GET'])
+@read_endpoint
+async def get_vulnerability(cve_id):
+    snapshot = await current_snapshot()
+    if snapshot is not None:
+        document = snapshot.document(cve_id)
+        if document is None:
+            return jsonify({"error": f"{cve_id} was not found."}), 404
+        return snapshot_response(snapshot, [document])
+
+    async def build():
+        ref = await db()[sync_app.collection_name].find_one({'cve_id': cve_id}, {'_id': 0}, max_time_ms=query_time_ms())
+        return (await join([ref]))[0] if ref else None
+
+    document = await run_query(build)
+    if document is None:
+        return jsonify({"error": f"{cve_id} was not found."}), 404
+    return jsonify(document)
+
+
+@app.route('/changes', methods=['GET'])
+@read_endpoint
+async def get_changes():
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(max(int(request.args.get('limit', sync_app.CHANGES_PAGE_SIZE)), 1), sync_app.CHANGES_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "'since' must be a token returned by this endpoint and 'limit' an integer."}), 400
+
+    async def build():
+        committed = storage.committed_sequence(await db()[sync_app.meta_collection_name].find_one(
+            {'_id': 'change_sequence'}, max_time_ms=query_time_ms()
+        ))
+        # Fetch one extra reference to know whether another page follows
+        cursor = (
+            db()[sync_app.collection_name].find({'seq': {'$gt': since, '$lte': committed}}, {'_id': 0},
+                                                max_time_ms=query_time_ms())
+            .sort('seq', 1)
+            .limit(limit + 1)
+        )
+        refs = await cursor.to_list(limit + 1)
+        has_more = len(refs) > limit
+        refs = refs[:limit]
+        return {
+            "changes": await join(refs),
+            "next": str(refs[-1]['seq']) if refs else str(since),
+            "has_more": has_more
+        }
+
+    return await cached_json_response(build)
+
+
+@app.route('/stats', methods=['GET'])
+@read_endpoint
+async def get_stats():
+    vendor = request.args.get('vendor', '').strip() or None
+    severity = request.args.get('severity', '').strip() or None
+
+    async def build():
+        cursor = db()[sync_app.stats_collection_name].find(
+            storage.stats_criteria(vendor, severity), {'_id': 0}, max_time_ms=query_time_ms()
+        ).sort(storage.STATS_SORT)
+        return storage.summarize_stats(await cursor.to_list(None))
+
+    return await cached_json_response(build)
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
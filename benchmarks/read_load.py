@@ -0,0 +1,127 @@
+"""Load the read endpoints of the sync and async servers with many concurrent readers.
+
+Start both servers against the same local mongod, e.g.
+
+    MONGODB_URL=mongodb://localhost:27017 DB_NAME=bench COLLECTION_NAME=cves \\
+        gunicorn app:app --workers 4 --bind 127.0.0.1:8001
+    MONGODB_URL=mongodb://localhost:27017 DB_NAME=bench COLLECTION_NAME=cves \\
+        hypercorn async_app:app --workers 4 --bind 127.0.0.1:8002
+
+optionally seed the database with synthetic vulnerabilities (with the same
+environment), then, from the repository root:
+
+    python benchmarks/read_load.py --seed 20000
+    python benchmarks/read_load.py http://127.0.0.1:8001 http://127.0.0.1:8002 --readers 1000
+
+Each reader is a thread with its own keep-alive session requesting random
+paths for the duration. Throughput only counts 2xx/304 responses; 503 (shed)
+and 504 (deadline) are reported separately. Seeding bumps the dataset
+generation without publishing a snapshot, so the servers read MongoDB until
+app.publish_snapshot() is run for the seeded data.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VENDORS = ['IBM', 'QNAP', 'WordFence', 'Microsoft', 'Cisco', 'Mozilla', 'Adobe']
+SEVERITIES = ['Low', 'Medium', 'High', 'Critical']
+
+
+def seed(count):
+    import app
+
+    vulnerabilities = [
+        {
+            'cve_id': f'CVE-2024-{i:05d}',
+            'published_date': f'{i % 28 + 1:02d}/{i % 12 + 1:02d}/2024',
+            'description': VENDORS[i % len(VENDORS)],
+            'org_link': f'https://example.com/advisory/{i // 3}',
+            'release_date': f'{i % 28 + 1:02d}/{i % 12 + 1:02d}/2024',
+            'severity': SEVERITIES[i % len(SEVERITIES)],
+            'summary': f'Synthetic vulnerability {i}',
+            'affected_products': [f'Product {i % 50}'],
+            'recommendations': 'Upgrade.',
+        }
+        for i in range(count)
+    ]
+    app.insert_many_vulnerabilities(vulnerabilities)
+    app.bump_generation()
+
+
+def request_paths(cve_count):
+    paths = ['/get_vulnerabilities', '/stats', '/changes?limit=100']
+    paths += [f'/get_vulnerabilities?vendor={vendor}' for vendor in VENDORS]
+    paths += [f'/stats?vendor={vendor}' for vendor in VENDORS]
+    paths += [f'/vulnerability/CVE-2024-{i:05d}' for i in random.sample(range(cve_count), min(cve_count, 200))]
+    return paths
+
+
+def reader(base_url, paths, stop_at, timeout, results, lock):
+    session = requests.Session()
+    latencies = []
+    statuses = Counter()
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        try:
+            status = session.get(base_url + random.choice(paths), timeout=timeout).status_code
+        except requests.RequestException:
+            status = 'error'
+        latencies.append(time.perf_counter() - start)
+        statuses[status] += 1
+    with lock:
+        results['latencies'].extend(latencies)
+        results['statuses'].update(statuses)
+
+
+def run(base_url, paths, readers, duration, timeout):
+    results = {'latencies': [], 'statuses': Counter()}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=reader, args=(base_url, paths, stop_at, timeout, results, lock), daemon=True)
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    statuses = results['statuses']
+    latencies = sorted(results['latencies'])
+    ok = sum(count for status, count in statuses.items() if status in (200, 304, 404))
+    p50 = statistics.median(latencies) * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    print(f"{base_url}: {ok / duration:8.1f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  "
+          f"503 {statuses[503]}  504 {statuses[504]}  errors {statuses['error'] + statuses[500]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('servers', nargs='*', help='base URLs to load, one after the other')
+    parser.add_argument('--readers', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--timeout', type=float, default=30, help='client-side timeout per request')
+    parser.add_argument('--cves', type=int, default=20000, help='CVE IDs to request, as seeded')
+    parser.add_argument('--seed', type=int, metavar='N', help='insert N synthetic vulnerabilities first')
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+        print(f"Seeded {args.seed} vulnerabilities")
+    paths = request_paths(args.seed or args.cves)
+    for server in args.servers:
+        run(server.rstrip('/'), paths, args.readers, args.duration, args.timeout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
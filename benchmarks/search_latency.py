@@ -0,0 +1,112 @@
+"""Measure the latency of storage.search, the query behind /search, at a million documents.
+
+Against a local mongod, from the repository root:
+
+    export MONGODB_URL=mongodb://localhost:27017 DB_NAME=bench COLLECTION_NAME=cves
+    python benchmarks/search_latency.py --seed 1000000
+    python benchmarks/search_latency.py --queries 2000
+
+Every query runs storage.search directly, so the response cache never answers
+for MongoDB. Terms range from selective (a plugin slug) to broad (a weakness
+class shared by a fifth of the corpus), and pages go up to --max-page. Exits
+non-zero when p99 is above --budget milliseconds.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VENDORS = ['IBM', 'QNAP', 'WordFence', 'Microsoft', 'Cisco', 'Mozilla', 'Adobe']
+PRODUCTS = [f'{name} {major}.{minor}' for name in (
+    'WebSphere', 'Db2', 'QTS', 'Firefox', 'Thunderbird', 'Exchange', 'Acrobat', 'IOS XE', 'Contact Form 7',
+    'Elementor', 'WooCommerce', 'Photon', 'Webex', 'Edge', 'SharePoint', 'Tivoli', 'Qsync', 'Photoshop',
+) for major in range(1, 11) for minor in range(5)]
+WEAKNESSES = ['cross-site scripting', 'SQL injection', 'remote code execution', 'denial of service',
+              'privilege escalation']
+SLUGS = [f'plugin-{i}' for i in range(5000)]
+BATCH_SIZE = 10000
+
+
+def synthetic(i):
+    product = PRODUCTS[i % len(PRODUCTS)]
+    return {
+        'cve_id': f'CVE-2024-{i:07d}',
+        'published_date': f'{i % 28 + 1:02d}/{i % 12 + 1:02d}/2024',
+        'description': VENDORS[i % len(VENDORS)],
+        'org_link': f'https://example.com/advisory/{i // 3}',
+        'release_date': f'{i % 28 + 1:02d}/{i % 12 + 1:02d}/2024',
+        'severity': 'High',
+        'summary': f'A {WEAKNESSES[i % len(WEAKNESSES)]} in {product} ({SLUGS[i % len(SLUGS)]}).',
+        'affected_products': [product],
+        'recommendations': 'Apply the fix from Fix Central.' if i % 7 == 0 else 'Upgrade.',
+    }
+
+
+def seed(count):
+    import app
+
+    for start in range(0, count, BATCH_SIZE):
+        if not app.insert_many_vulnerabilities([synthetic(i) for i in range(start, min(start + BATCH_SIZE, count))]):
+            raise SystemExit(f'Seeding failed at {start}')
+    app.bump_generation()
+
+
+def search_queries():
+    queries = [f'"{slug}"' for slug in random.sample(SLUGS, 50)]
+    queries += [product.split()[0] for product in PRODUCTS[::50]]
+    queries += [f'"{weakness}"' for weakness in WEAKNESSES]
+    queries += ['"Fix Central"', 'WebSphere', 'Elementor']
+    return queries
+
+
+def run(queries, count, max_page, per_page):
+    from pymongo import MongoClient
+
+    import app
+    from nvd_scraper import storage
+
+    client = MongoClient(app.url)
+    db = client[app.db_name]
+    latencies = []
+    try:
+        for _ in range(count):
+            skip = random.randrange(max_page) * per_page
+            start = time.perf_counter()
+            storage.search(db[app.collection_name], db[app.advisory_collection_name],
+                           random.choice(queries), skip, per_page)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        client.close()
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{count} searches: p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  max {latencies[-1] * 1000:7.1f} ms")
+    return p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=1000, help='searches to time')
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--max-page', type=int, default=5, help='pages are drawn from 1..N')
+    parser.add_argument('--budget', type=float, default=50, help='p99 target in milliseconds')
+    parser.add_argument('--seed', type=int, metavar='N', help='insert N synthetic vulnerabilities first')
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+        print(f"Seeded {args.seed} vulnerabilities")
+    p99 = run(search_queries(), args.queries, args.max_page, args.per_page)
+    if p99 > args.budget:
+        print(f"p99 is over the {args.budget:g} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Measure the cold-start import cost of the Flask app.
+
+Run from the repository root:
+
+    python benchmarks/startup.py --runs 10 --budget-ms 400
+
+Each run imports app.py in a fresh interpreter. The script reports the median
+and worst wall time, the slowest imports according to ``python -X importtime``,
+and fails when the crawling stack is imported or the median exceeds the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Packages the read-only API must not import at startup
+CRAWL_STACK = ('scrapy', 'twisted', 'selenium')
+LOADED_MODULES = (
+    "import json, sys, app; "
+    "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))"
+)
+
+
+def time_import(runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import app'], cwd=ROOT, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def slowest_imports(limit):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, check=True, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        entries.append((int(cumulative), name))
+    # Only top-level packages, nested imports are already part of their parent's cumulative time
+    top_level = [(us, name) for us, name in entries if '.' not in name]
+    return sorted(top_level, reverse=True)[:limit]
+
+
+def loaded_crawl_stack():
+    result = subprocess.run([sys.executable, '-c', LOADED_MODULES],
+                            cwd=ROOT, check=True, capture_output=True, text=True)
+    modules = json.loads(result.stdout)
+    return [name for name in modules if name in CRAWL_STACK]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='fail when the median import time exceeds this')
+    args = parser.parse_args()
+
+    timings = time_import(args.runs)
+    median = statistics.median(timings)
+    print(f"import app: median {median:.1f} ms, max {max(timings):.1f} ms over {args.runs} runs")
+
+    print("slowest top-level imports (cumulative):")
+    for microseconds, name in slowest_imports(args.top):
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+
+    failed = False
+    crawl_stack = loaded_crawl_stack()
+    if crawl_stack:
+        print(f"FAIL: the API imports the crawling stack: {', '.join(crawl_stack)}")
+        failed = True
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"FAIL: median {median:.1f} ms exceeds the {args.budget_ms:.1f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
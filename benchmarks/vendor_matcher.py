@@ -0,0 +1,80 @@
+"""Compare the NVD vendor relevance filters on a recorded sample.
+
+Record a sample first; in this mode every CVE's detail page is fetched, so
+each row's outcome (did NVD list a vendor link we can follow?) is known:
+
+    scrapy crawl nvd_spider -a max_pages=10 -a record_relevance=data/relevance_sample.jsonl
+
+then, from the repository root:
+
+    python benchmarks/vendor_matcher.py data/relevance_sample.jsonl
+
+A CVE is a true positive when the filter would fetch its details and the
+page has a vendor link. Every false positive is a wasted rate-limited detail
+request, every false negative a vendor advisory the second level never sees.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nvd_scraper.vendor_matcher import VendorMatcher  # noqa: E402
+
+# The filter NVDSpider used before the matcher: raw substrings of the summary
+LEGACY_TARGET_ORGS = ['ibm', 'qnap', 'word', 'adobe', 'microsoft', 'windows', 'mac', 'apple', 'cisco']
+
+
+def legacy_filter(sample):
+    return any(org in sample['summary'] for org in LEGACY_TARGET_ORGS)
+
+
+def load_sample(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(name, predict, samples):
+    start = time.perf_counter()
+    predictions = [predict(sample) for sample in samples]
+    elapsed = time.perf_counter() - start
+    tp = fp = fn = 0
+    for sample, fetched in zip(samples, predictions):
+        useful = bool(sample['org_link'])
+        tp += fetched and useful
+        fp += fetched and not useful
+        fn += useful and not fetched
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    print(f"{name:8} requests {tp + fp:6}  wasted {fp:6}  missed {fn:4}  "
+          f"precision {precision:6.1%}  recall {recall:6.1%}  "
+          f"{elapsed / max(len(samples), 1) * 1e6:6.1f} us/summary")
+    return tp + fp, fn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sample')
+    parser.add_argument('--misses', action='store_true', help='list the vendor CVEs the matcher skips')
+    args = parser.parse_args()
+
+    samples = load_sample(args.sample)
+    useful = sum(1 for sample in samples if sample['org_link'])
+    print(f"{len(samples)} CVEs in the sample, {useful} with a followable vendor link")
+
+    matcher = VendorMatcher()
+    legacy_requests, _ = evaluate('legacy', legacy_filter, samples)
+    matcher_requests, missed = evaluate('matcher', lambda sample: matcher.is_relevant(sample['summary'], sample['cpes']), samples)
+    print(f"detail requests saved: {legacy_requests - matcher_requests}")
+
+    if args.misses:
+        for sample in samples:
+            if sample['org_link'] and not matcher.is_relevant(sample['summary'], sample['cpes']):
+                print(f"  {sample['cve_id']}: {sample['org_link']}  {sample['summary'][:80]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
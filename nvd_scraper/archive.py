@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+
+class ResponseArchive:
+    """Content-addressed store of fetched response bodies.
+
+    Bodies are gzip-compressed under objects/<2 hex>/<sha256>.gz, so a page that
+    has not changed is stored once however often it is fetched. Every archived
+    response appends a line to manifests/<spider>.jsonl with its URL, body hash,
+    the extraction callback and the request meta that callback reads.
+
+    Spiders opt in with an ``archive_callbacks`` attribute mapping callback names
+    to the meta keys to keep.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get('RESPONSE_ARCHIVE_DIR'))
+
+    def object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f'{digest}.gz')
+
+    def manifest_path(self, spider_name):
+        return os.path.join(self.root, 'manifests', f'{spider_name}.jsonl')
+
+    def put(self, body):
+        """Store a body unless an identical one is already archived; returns its sha256."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest):
+        with gzip.open(self.object_path(digest), 'rb') as f:
+            return f.read()
+
+    def record(self, spider, response, callback):
+        """Archive a response handled by one of the spider's extraction callbacks."""
+        meta_keys = getattr(spider, 'archive_callbacks', {}).get(callback)
+        if meta_keys is None:
+            return None
+        try:
+            digest = self.put(response.body)
+            entry = {
+                'url': response.url,
+                'sha256': digest,
+                'status': response.status,
+                'encoding': getattr(response, 'encoding', None),
+                'callback': callback,
+                'meta': {key: response.meta[key] for key in meta_keys if key in response.meta},
+                'fetched_at': datetime.now(timezone.utc).isoformat(),
+            }
+            path = self.manifest_path(spider.name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+            return digest
+        except OSError as e:
+            spider.logger.warning(f"Could not archive {response.url}: {e}")
+            return None
+
+    def entries(self, spider_name):
+        """The latest manifest entry per callback, URL and meta, oldest first."""
+        latest = {}
+        try:
+            with open(self.manifest_path(spider_name)) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    key = (entry['callback'], entry['url'], json.dumps(entry['meta'], sort_keys=True))
+                    latest.pop(key, None)
+                    latest[key] = entry
+        except FileNotFoundError:
+            return []
+        return list(latest.values())
@@ -0,0 +1,64 @@
+import queue
+import threading
+
+
+class Subscription:
+    """One stream client: its filters and a bounded buffer of pending documents."""
+
+    def __init__(self, vendors, severities, buffer_size):
+        self.vendors = vendors
+        self.severities = severities
+        self.queue = queue.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def matches(self, doc):
+        if self.vendors:
+            vendor = (doc.get('description') or '').lower()
+            if not any(wanted in vendor for wanted in self.vendors):
+                return False
+        if self.severities and (doc.get('severity') or '').lower() not in self.severities:
+            return False
+        return True
+
+    def offer(self, doc):
+        # A slow client loses its oldest pending documents instead of holding up the others
+        while True:
+            try:
+                self.queue.put_nowait(doc)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class Broadcaster:
+    """Fans each published document out to every matching subscriber."""
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, vendors=(), severities=()):
+        subscription = Subscription(
+            {vendor.lower() for vendor in vendors},
+            {severity.lower() for severity in severities},
+            self.buffer_size
+        )
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, doc):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.matches(doc):
+                subscription.offer(doc)
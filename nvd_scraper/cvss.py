@@ -0,0 +1,146 @@
+"""CVSS base scores, vectors and a canonical severity for every vendor's advisories.
+
+Vendors publish severity as free text in their own vocabulary (Microsoft's
+"Important", Mozilla's "moderate", IBM's bare scores). Items additionally carry
+``cvss_score`` (float), ``cvss_vector`` (CVSS v3.x string) and
+``severity_level``, one of SEVERITY_LEVELS, so they can be ranked and indexed.
+"""
+import math
+import re
+
+# Canonical severities, least to most severe
+SEVERITY_LEVELS = ('unknown', 'none', 'low', 'medium', 'high', 'critical')
+
+# Vendor severity words -> canonical severity
+SEVERITY_ALIASES = {
+    'critical': 'critical',
+    'high': 'high',
+    'important': 'high',
+    'medium': 'medium',
+    'moderate': 'medium',
+    'low': 'low',
+    'none': 'none',
+    'informational': 'none',
+}
+SEVERITY_PATTERN = re.compile(r'\b(' + '|'.join(SEVERITY_ALIASES) + r')\b', re.IGNORECASE)
+
+# Base metrics first, optionally followed by temporal and environmental ones
+VECTOR_PATTERN = re.compile(r'CVSS:3\.[01](?:/[A-Za-z]{1,3}:[A-Za-z])+')
+SCORE_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+# CVSS v3.1 specification, section 7.4
+WEIGHTS = {
+    'AV': {'N': 0.85, 'A': 0.62, 'L': 0.55, 'P': 0.2},
+    'AC': {'L': 0.77, 'H': 0.44},
+    'UI': {'N': 0.85, 'R': 0.62},
+    'C': {'H': 0.56, 'L': 0.22, 'N': 0},
+    'I': {'H': 0.56, 'L': 0.22, 'N': 0},
+    'A': {'H': 0.56, 'L': 0.22, 'N': 0},
+}
+PRIVILEGES_REQUIRED = {
+    'U': {'N': 0.85, 'L': 0.62, 'H': 0.27},
+    'C': {'N': 0.85, 'L': 0.68, 'H': 0.5},
+}
+
+
+def parse_score(text):
+    """'9.8 CRITICAL' -> 9.8, or None when the text has no score between 0 and 10."""
+    match = SCORE_PATTERN.search(text or '')
+    if not match:
+        return None
+    score = float(match.group())
+    return score if 0 <= score <= 10 else None
+
+
+def find_vector(text):
+    match = VECTOR_PATTERN.search(text or '')
+    return match.group() if match else None
+
+
+def roundup(value):
+    """Round up to one decimal, avoiding floating point artifacts (CVSS v3.1 appendix A)."""
+    integer = round(value * 100000)
+    if integer % 10000 == 0:
+        return integer / 100000.0
+    return (math.floor(integer / 10000) + 1) / 10.0
+
+
+def base_score(vector):
+    """Compute the base score of a CVSS v3.x vector, or None if it lacks a base metric."""
+    metrics = dict(part.split(':', 1) for part in vector.split('/')[1:] if ':' in part)
+    try:
+        scope = metrics['S']
+        values = {metric: WEIGHTS[metric][metrics[metric]] for metric in WEIGHTS}
+        privileges = PRIVILEGES_REQUIRED[scope][metrics['PR']]
+    except KeyError:
+        return None
+
+    iss = 1 - (1 - values['C']) * (1 - values['I']) * (1 - values['A'])
+    if scope == 'U':
+        impact = 6.42 * iss
+    else:
+        impact = 7.52 * (iss - 0.029) - 3.25 * (iss - 0.02) ** 15
+    exploitability = 8.22 * values['AV'] * values['AC'] * privileges * values['UI']
+    if impact <= 0:
+        return 0.0
+    if scope == 'U':
+        return roundup(min(impact + exploitability, 10))
+    return roundup(min(1.08 * (impact + exploitability), 10))
+
+
+def score_severity(score):
+    """The CVSS v3 qualitative rating of a base score."""
+    if score is None:
+        return 'unknown'
+    if score == 0:
+        return 'none'
+    if score < 4.0:
+        return 'low'
+    if score < 7.0:
+        return 'medium'
+    if score < 9.0:
+        return 'high'
+    return 'critical'
+
+
+def normalize_severity(text):
+    """Map a vendor's severity text to a canonical severity, from the first severity word in it."""
+    match = SEVERITY_PATTERN.search(text or '')
+    return SEVERITY_ALIASES[match.group().lower()] if match else 'unknown'
+
+
+def extract_cvss(text):
+    """Find a CVSS v3.x vector in free text; return (base score, vector), or (None, None)."""
+    vector = find_vector(text)
+    if vector is None:
+        return None, None
+    return base_score(vector), vector
+
+
+def cvss_fields(score=None, vector=None, severity=None):
+    """The CVSS item fields from whatever a page exposes.
+
+    A published score wins over one computed from the vector, and the severity
+    level comes from the score when there is one, else from the severity text.
+    """
+    if isinstance(score, str):
+        score = parse_score(score)
+    vector = find_vector(vector) if vector else None
+    if score is None and vector:
+        score = base_score(vector)
+    level = score_severity(score) if score is not None else normalize_severity(severity)
+    return {'cvss_score': score, 'cvss_vector': vector, 'severity_level': level}
+
+
+def item_cvss(scraped_item, reference=None):
+    """The CVSS fields of a scraped item, from the score, vector and severity it carries.
+
+    Without a score on the page, the one NVD listed for the CVE (kept on the
+    reference by the first scraping level) is used. A ``severity_level`` the
+    spider set itself takes the place of the severity text.
+    """
+    severity = scraped_item.get('severity_level') or scraped_item.get('severity')
+    fields = cvss_fields(scraped_item.get('cvss_score'), scraped_item.get('cvss_vector'), severity)
+    if fields['cvss_score'] is None and reference and reference.get('cvss') is not None:
+        fields = cvss_fields(reference['cvss'], fields['cvss_vector'], severity)
+    return fields
@@ -0,0 +1,123 @@
+import logging
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from nvd_scraper.profiling import Profiler, profile_directory
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingExtension:
+    """Profile spider callbacks and item pipelines when PROFILE_ENABLED is set.
+
+    Each callback named in PROFILE_CALLBACKS is wrapped on the spider instance
+    when it opens. When 'process_item' is listed, the process_item of every
+    pipeline in ITEM_PIPELINES is wrapped in the item processor too, profiled
+    as <Pipeline>.process_item. Nothing is installed when profiling is off.
+    """
+
+    def __init__(self, crawler, callbacks, sample_interval):
+        self.crawler = crawler
+        self.callbacks = callbacks
+        self.sample_interval = sample_interval
+        self.profiler = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('PROFILE_ENABLED'):
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            crawler.settings.getlist('PROFILE_CALLBACKS'),
+            crawler.settings.getfloat('PROFILE_SAMPLE_INTERVAL'),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        # Dump after the spider's own closed() has run so it is part of the profile
+        crawler.signals.connect(ext.engine_stopped, signal=signals.engine_stopped)
+        return ext
+
+    def spider_opened(self, spider):
+        self.profiler = Profiler(spider.name, profile_directory(), self.sample_interval)
+        for name in self.callbacks:
+            callback = getattr(spider, name, None)
+            if callable(callback):
+                setattr(spider, name, self.profiler.wrap(name, callback))
+        if 'process_item' in self.callbacks:
+            self.wrap_pipelines()
+        self.profiler.start()
+        spider.logger.info(f"Profiling {spider.name} into {self.profiler.output_dir}")
+
+    def wrap_pipelines(self):
+        itemproc = self.crawler.engine.scraper.itemproc
+        pipelines = [pipe for pipe in itemproc.middlewares if hasattr(pipe, 'process_item')]
+        methods = itemproc.methods['process_item']
+        # The manager appends one method per pipeline that has process_item, in order
+        for index, pipe in enumerate(pipelines):
+            methods[index] = self.profiler.wrap(f'{type(pipe).__name__}.process_item', methods[index])
+
+    def engine_stopped(self):
+        if self.profiler is None:
+            return
+        self.profiler.stop()
+        self.profiler.dump()
+        for label, seconds in self.profiler.summary():
+            logger.info(f"[profile] {self.profiler.name}.{label}: {seconds:.3f}s")
+
+
+class RunDeadlineExtension:
+    """Close the spider gracefully when the run's deadline is reached.
+
+    RUN_DEADLINE is a Unix time shared by every crawl of a run; crawls started
+    from app.py inherit it from the environment. Each spider stops
+    RUN_DEADLINE_MARGIN seconds early, which leaves time to store what was
+    scraped. A spider also uses at most RUN_DEADLINE_SHARE of the time left when
+    it opens, so discovery leaves room for the vendor spiders. The spider is
+    closed through the engine, so its closed() still writes the items it has.
+    """
+
+    def __init__(self, crawler, deadline, margin, share):
+        self.crawler = crawler
+        self.deadline = deadline
+        self.margin = margin
+        self.share = share
+        self.call = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        deadline = crawler.settings.getfloat('RUN_DEADLINE')
+        if not deadline:
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            deadline,
+            crawler.settings.getfloat('RUN_DEADLINE_MARGIN'),
+            crawler.settings.getfloat('RUN_DEADLINE_SHARE', 1.0),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        from twisted.internet import reactor
+
+        now = time.time()
+        remaining = max((self.deadline - self.margin - now) * self.share, 0)
+        # Spiders that loop outside the scheduler (QNAP) check this themselves
+        spider.deadline = now + remaining
+        self.call = reactor.callLater(remaining, self.close, spider)
+        spider.logger.info(f"{spider.name} has {remaining:.0f}s before the run deadline")
+
+    def close(self, spider):
+        engine = self.crawler.engine
+        pending = len(engine.slot.scheduler) if engine.slot else 0
+        self.crawler.stats.set_value('deadline/pending_requests', pending)
+        # Requests already downloading are let through, the scheduled ones are dropped
+        spider.logger.warning(f"Run deadline reached, closing {spider.name}: {pending} requests dropped, "
+                              f"{len(engine.downloader.active)} still downloading")
+        self.crawler.engine.close_spider(spider, 'deadline')
+
+    def spider_closed(self, spider):
+        if self.call is not None and self.call.active():
+            self.call.cancel()
@@ -0,0 +1,124 @@
+"""Declarative extraction rules shared by the vendor spiders.
+
+A spider describes the values it needs as ``Field`` and ``Rows`` rules. Every
+CSS selector is translated to XPath and compiled into an ``lxml.etree.XPath``
+object when the rule is created, i.e. once when the spider module is imported,
+and pages are then extracted by running those compiled expressions directly
+against the document tree Parsel has already parsed for the response.
+"""
+import re
+from datetime import datetime
+
+from lxml import etree
+from parsel.csstranslator import css2xpath
+from parsel.utils import extract_regex
+
+# Formats the vendor pages use for dates, tried in order
+DATE_FORMATS = ("%B %d, %Y; %I:%M:%S %p -0400", "%B %d, %Y", "%d %b %Y", "%Y-%m-%d")
+
+
+def compile_query(css=None, xpath=None):
+    if (css is None) == (xpath is None):
+        raise ValueError("A rule needs exactly one of css or xpath")
+    return etree.XPath(css2xpath(css) if css is not None else xpath)
+
+
+def serialize(node):
+    """Return text and attribute results as strings and elements as their HTML, like Selector.get()."""
+    if isinstance(node, etree._Element):
+        return etree.tostring(node, method='html', encoding='unicode', with_tail=False)
+    return str(node)
+
+
+def format_date(date_string, formats=DATE_FORMATS):
+    """Convert a vendor date to dd/mm/yyyy, returning the input unchanged if no format matches."""
+    if not date_string:
+        return None
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_string.strip(), fmt).strftime("%d/%m/%Y")
+        except ValueError:
+            continue
+    return date_string
+
+
+def strip(value):
+    return value.strip()
+
+
+class Field:
+    """One value extracted from a page (or from a row, inside ``Rows``).
+
+    - ``many``: return every match instead of the first one
+    - ``re``: keep the regex matches of each result, like SelectorList.re()/re_first()
+    - ``join``: join all matches with this separator into one string (implies many)
+    - ``post``: applied to the final value, or to each value of a list
+    - ``fallback``: another rule tried when this one finds nothing
+    """
+
+    def __init__(self, css=None, xpath=None, many=False, re=None, join=None, post=None,
+                 fallback=None, default=None):
+        self.query = compile_query(css, xpath)
+        self.many = many or join is not None
+        self.regex = _compile_regex(re)
+        self.join = join
+        self.post = post
+        self.fallback = fallback
+        self.default = default
+
+    def values(self, node):
+        result = self.query(node)
+        if not isinstance(result, list):
+            result = [result]
+        values = [serialize(match) for match in result]
+        if self.regex is not None:
+            values = [found for value in values for found in extract_regex(self.regex, value)]
+        return values
+
+    def evaluate(self, node):
+        values = self.values(node)
+        if not values and self.fallback is not None:
+            return self.fallback.evaluate(node)
+        if self.join is not None:
+            value = self.join.join(values)
+        elif self.many:
+            return [self.post(value) for value in values] if self.post else values
+        elif values:
+            value = values[0]
+        else:
+            return self.default
+        return self.post(value) if self.post else value
+
+
+class Rows:
+    """A list of records, one per element matched by the row selector.
+
+    The named fields are evaluated relative to each row element.
+    """
+
+    def __init__(self, css=None, xpath=None, **fields):
+        self.query = compile_query(css, xpath)
+        self.fields = fields
+
+    def evaluate(self, node):
+        return [
+            {name: field.evaluate(row) for name, field in self.fields.items()}
+            for row in self.query(node)
+        ]
+
+
+class Extractor:
+    """Evaluates a set of named rules over a response's parsed document in one pass."""
+
+    def __init__(self, rules):
+        self.rules = dict(rules)
+
+    def extract(self, response):
+        root = response.selector.root
+        return {name: rule.evaluate(root) for name, rule in self.rules.items()}
+
+
+def _compile_regex(pattern):
+    if pattern is None or isinstance(pattern, re.Pattern):
+        return pattern
+    return re.compile(pattern)
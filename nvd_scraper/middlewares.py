@@ -3,7 +3,16 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import random
+import time
+from collections import deque
+
 from scrapy import signals
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest, NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet import task
+
+from nvd_scraper.archive import ResponseArchive
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
@@ -101,3 +110,235 @@ class NvdScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class RequestDeferred(IgnoreRequest):
+    """Raised for a request parked in the circuit breaker's deferred queue.
+
+    The request is scheduled again once its host accepts traffic, so errbacks
+    should not treat this as a failure.
+    """
+
+
+class HostBreaker:
+    def __init__(self, cooldown, retry_budget):
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown = cooldown
+        self.retry_budget = retry_budget
+        self.probe_in_flight = False
+        self.deferred = deque()
+
+
+class CircuitBreakerMiddleware:
+    # Tracks failures per host. After CIRCUIT_BREAKER_THRESHOLD consecutive
+    # failures the breaker opens and requests for that host are parked in a
+    # deferred queue instead of burning timeouts. After the cooldown a single
+    # probe request is let through (half-open); its outcome closes the breaker
+    # or reopens it with a doubled cooldown. Failed requests are retried with
+    # exponential backoff and full jitter while the host's retry budget lasts.
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.threshold = settings.getint('CIRCUIT_BREAKER_THRESHOLD', 5)
+        self.cooldown = settings.getfloat('CIRCUIT_BREAKER_COOLDOWN', 30)
+        self.max_cooldown = settings.getfloat('CIRCUIT_BREAKER_MAX_COOLDOWN', 600)
+        self.retry_budget = settings.getint('CIRCUIT_BREAKER_RETRY_BUDGET', 20)
+        self.max_retry_times = settings.getint('CIRCUIT_BREAKER_RETRY_TIMES', 3)
+        self.backoff_base = settings.getfloat('CIRCUIT_BREAKER_BACKOFF_BASE', 1)
+        self.backoff_max = settings.getfloat('CIRCUIT_BREAKER_BACKOFF_MAX', 60)
+        self.retry_http_codes = {int(code) for code in settings.getlist('CIRCUIT_BREAKER_RETRY_HTTP_CODES')}
+        self.breakers = {}
+        self.release_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('CIRCUIT_BREAKER_ENABLED'):
+            raise NotConfigured
+        s = cls(crawler)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def breaker_for(self, request):
+        host = urlparse_cached(request).hostname or ''
+        if host not in self.breakers:
+            self.breakers[host] = HostBreaker(self.cooldown, self.retry_budget)
+        return host, self.breakers[host]
+
+    def process_request(self, request, spider):
+        host, breaker = self.breaker_for(request)
+        if request.meta.get('breaker_not_before', 0) > time.monotonic():
+            return self.defer(host, breaker, request)
+        if breaker.state == 'open':
+            return self.defer(host, breaker, request)
+        if breaker.state == 'half_open':
+            if breaker.probe_in_flight:
+                return self.defer(host, breaker, request)
+            breaker.probe_in_flight = True
+            request.meta['breaker_probe'] = True
+            spider.logger.info(f"Circuit breaker for {host} is half-open, probing with {request.url}")
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status in self.retry_http_codes:
+            return self.record_failure(request, f"HTTP {response.status}", spider) or response
+        self.record_success(request, spider)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if isinstance(exception, IgnoreRequest):
+            return None
+        return self.record_failure(request, exception.__class__.__name__, spider)
+
+    def record_success(self, request, spider):
+        host, breaker = self.breaker_for(request)
+        breaker.failures = 0
+        if request.meta.pop('breaker_probe', False):
+            breaker.probe_in_flight = False
+            if breaker.state != 'closed':
+                spider.logger.info(f"Circuit breaker for {host} closed")
+                breaker.cooldown = self.cooldown
+                self.set_state(host, breaker, 'closed')
+
+    def record_failure(self, request, reason, spider):
+        host, breaker = self.breaker_for(request)
+        breaker.failures += 1
+        self.stats.inc_value(f'circuit_breaker/failures/{host}')
+        if request.meta.pop('breaker_probe', False):
+            breaker.probe_in_flight = False
+            breaker.cooldown = min(breaker.cooldown * 2, self.max_cooldown)
+            self.open(host, breaker, spider, reason)
+        elif breaker.state == 'closed' and breaker.failures >= self.threshold:
+            self.open(host, breaker, spider, reason)
+
+        retry_times = request.meta.get('breaker_retry_times', 0)
+        if retry_times >= self.max_retry_times:
+            self.stats.inc_value('circuit_breaker/retries_exhausted')
+            return None
+        if breaker.retry_budget <= 0:
+            self.stats.inc_value('circuit_breaker/budget_exhausted')
+            if breaker.state == 'open':
+                self.abandon(host, breaker, spider)
+            return None
+
+        breaker.retry_budget -= 1
+        # Full jitter: anywhere between 0 and the exponential backoff ceiling
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry_times))
+        retry = request.copy()
+        retry.meta['breaker_retry_times'] = retry_times + 1
+        retry.meta['breaker_not_before'] = time.monotonic() + delay
+        retry.dont_filter = True
+        self.stats.inc_value('circuit_breaker/retries')
+        spider.logger.info(f"Retrying {request.url} in {delay:.1f}s after {reason} "
+                           f"({breaker.retry_budget} retries left for {host})")
+        return retry
+
+    def open(self, host, breaker, spider, reason):
+        breaker.opened_at = time.monotonic()
+        if breaker.state != 'open':
+            spider.logger.warning(f"Circuit breaker for {host} opened after {breaker.failures} failures "
+                                  f"(last: {reason}), cooling down for {breaker.cooldown:.0f}s")
+            self.stats.inc_value('circuit_breaker/opened')
+        self.set_state(host, breaker, 'open')
+
+    def abandon(self, host, breaker, spider):
+        # The host is down and out of retries: drop what is still queued for it
+        if breaker.deferred:
+            spider.logger.error(f"Abandoning {len(breaker.deferred)} requests for {host}, retry budget exhausted")
+            self.stats.inc_value('circuit_breaker/abandoned', len(breaker.deferred))
+            breaker.deferred.clear()
+
+    def defer(self, host, breaker, request):
+        breaker.deferred.append(request)
+        self.stats.inc_value('circuit_breaker/short_circuited')
+        self.stats.set_value(f'circuit_breaker/deferred/{host}', len(breaker.deferred))
+        raise RequestDeferred(f"Deferred by circuit breaker ({breaker.state}): {request.url}")
+
+    def set_state(self, host, breaker, state):
+        breaker.state = state
+        self.stats.set_value(f'circuit_breaker/state/{host}', state)
+
+    def release(self, spider):
+        now = time.monotonic()
+        for host, breaker in self.breakers.items():
+            # One host's failure must not stop the loop, or nothing is ever released again
+            try:
+                self.release_host(host, breaker, now, spider)
+            except Exception:
+                spider.logger.exception(f"Could not release the requests deferred for {host}")
+
+    def release_host(self, host, breaker, now, spider):
+        if breaker.state == 'open' and now - breaker.opened_at >= breaker.cooldown:
+            self.set_state(host, breaker, 'half_open')
+        if breaker.state == 'open' or not breaker.deferred:
+            return
+
+        pending = deque()
+        while breaker.deferred:
+            request = breaker.deferred.popleft()
+            ready = request.meta.get('breaker_not_before', 0) <= now
+            # A half-open host only gets one request until the probe comes back
+            if ready and (breaker.state == 'closed' or not breaker.probe_in_flight):
+                try:
+                    # The dupefilter has already seen this request when it was first scheduled
+                    self.crawler.engine.crawl(request.replace(dont_filter=True), spider)
+                except Exception:
+                    # Dropped rather than kept, so a request that cannot be scheduled
+                    # does not keep the spider open forever
+                    self.stats.inc_value('circuit_breaker/release_errors')
+                    spider.logger.exception(f"Could not reschedule {request.url}, dropping it")
+                    continue
+                if breaker.state == 'half_open':
+                    break
+            else:
+                pending.append(request)
+        breaker.deferred.extendleft(reversed(pending))
+        self.stats.set_value(f'circuit_breaker/deferred/{host}', len(breaker.deferred))
+
+    def spider_opened(self, spider):
+        self.release_loop = task.LoopingCall(self.release, spider)
+        self.release_loop.start(1.0, now=False)
+
+    def spider_idle(self, spider):
+        if any(breaker.deferred for breaker in self.breakers.values()):
+            raise DontCloseSpider
+
+    def spider_closed(self, spider):
+        if self.release_loop and self.release_loop.running:
+            self.release_loop.stop()
+        for host, breaker in self.breakers.items():
+            if breaker.failures or breaker.state != 'closed':
+                spider.logger.info(f"Circuit breaker for {host}: {breaker.state}, "
+                                   f"{breaker.failures} consecutive failures, {breaker.retry_budget} retries left")
+
+
+class ResponseArchiveMiddleware:
+    # Stores the body of every successful response whose callback the spider
+    # lists in archive_callbacks, so extraction can be rerun offline with
+    # `python -m nvd_scraper.reextract <spider>`. Spiders that render or fetch
+    # pages themselves call spider.response_archive.record() directly.
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('RESPONSE_ARCHIVE_ENABLED'):
+            raise NotConfigured
+        s = cls(ResponseArchive.from_settings(crawler.settings))
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        return s
+
+    def spider_opened(self, spider):
+        spider.response_archive = self.archive
+
+    def process_response(self, request, response, spider):
+        if response.status == 200:
+            callback = getattr(request.callback, '__name__', None) or 'parse'
+            self.archive.record(spider, response, callback)
+        return response
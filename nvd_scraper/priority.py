@@ -0,0 +1,54 @@
+import re
+
+# Summary phrases that suggest a severe issue, with the priority they add
+KEYWORD_WEIGHTS = {
+    'actively exploited': 40,
+    'exploited in the wild': 40,
+    'zero-day': 30,
+    'remote code execution': 30,
+    'arbitrary code': 25,
+    'unauthenticated': 20,
+    'authentication bypass': 20,
+    'command injection': 20,
+    'privilege escalation': 15,
+    'elevation of privilege': 15,
+    'sql injection': 15,
+    'deserialization': 15,
+    'memory corruption': 10,
+    'use-after-free': 10,
+    'buffer overflow': 10,
+    'denial of service': 5,
+    'cross-site scripting': 3,
+}
+KEYWORD_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in KEYWORD_WEIGHTS), re.IGNORECASE)
+KEYWORD_CAP = 50
+
+# Vendors whose products are most widely deployed in the estates this feeds
+VENDOR_WEIGHTS = {
+    'Microsoft': 10,
+    'Cisco': 10,
+    'IBM': 5,
+    'QNAP': 5,
+    'WordFence': 0,
+}
+
+# A missing CVSS score counts as medium, so keywords alone can still lift a CVE
+UNKNOWN_CVSS = 5.0
+
+
+def cve_priority(summary, vendors=(), cvss=None):
+    """Scrapy request priority of a CVE from its summary, matched vendors and CVSS base score.
+
+    CVSS dominates (0-100); keywords add up to KEYWORD_CAP and the vendor weight
+    breaks ties between otherwise similar CVEs.
+    """
+    score = UNKNOWN_CVSS if cvss is None else cvss
+    keywords = {found.group().lower() for found in KEYWORD_PATTERN.finditer(summary or '')}
+    bonus = min(sum(KEYWORD_WEIGHTS[keyword] for keyword in keywords), KEYWORD_CAP)
+    vendor_bonus = max((VENDOR_WEIGHTS.get(vendor, 0) for vendor in vendors), default=0)
+    return int(round(score * 10)) + bonus + vendor_bonus
+
+
+def group_priority(items):
+    """An advisory is fetched as early as the most urgent CVE it covers."""
+    return max((item.get('priority', 0) for item in items), default=0)
@@ -0,0 +1,132 @@
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Profiles currently collecting on the main thread, innermost last. Only one
+# cProfile.Profile can be enabled at a time, so nested sections pause the outer one.
+_active = []
+
+
+def profiling_enabled():
+    return os.getenv('SCRAPER_PROFILE') == '1'
+
+
+def profile_directory():
+    """Directory of the current run, shared with child processes through the environment."""
+    run = os.environ.setdefault('SCRAPER_PROFILE_RUN', datetime.now().strftime('%Y%m%d-%H%M%S'))
+    return os.path.join(os.getenv('SCRAPER_PROFILE_DIR', 'data/profiles'), run)
+
+
+class Profiler:
+    """Deterministic profiles per label plus sampled stacks in flamegraph's collapsed format."""
+
+    def __init__(self, name, output_dir, sample_interval=0.005):
+        self.name = name
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.profiles = {}
+        self.samples = Counter()
+        self._labels = []
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        self._sampler = threading.Thread(target=self._sample, name=f'profiler-{self.name}', daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+
+    def wrap(self, label, fn):
+        """Profile every call of fn, including the iteration of the generators it returns."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self._enter(label)
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                self._exit()
+            if inspect.isgenerator(result):
+                return self._iterate(label, result)
+            return result
+        return wrapper
+
+    @contextmanager
+    def section(self, label):
+        self._enter(label)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def dump(self):
+        """Write one .prof file per label and the collapsed stacks; returns the written paths."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        for label, profile in self.profiles.items():
+            path = os.path.join(self.output_dir, f'{self.name}.{label}.prof')
+            profile.dump_stats(path)
+            paths.append(path)
+        path = os.path.join(self.output_dir, f'{self.name}.collapsed')
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f'{stack} {count}\n')
+        paths.append(path)
+        return paths
+
+    def summary(self):
+        """Total profiled seconds per label, slowest first."""
+        totals = {label: pstats.Stats(profile).total_tt for label, profile in self.profiles.items()}
+        return sorted(totals.items(), key=lambda entry: entry[1], reverse=True)
+
+    def _iterate(self, label, generator):
+        while True:
+            self._enter(label)
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def _enter(self, label):
+        profile = self.profiles.setdefault(label, cProfile.Profile())
+        if _active:
+            _active[-1].disable()
+        _active.append(profile)
+        self._labels.append(label)
+        profile.enable()
+
+    def _exit(self):
+        _active.pop().disable()
+        self._labels.pop()
+        if _active:
+            _active[-1].enable()
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            if not self._labels:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}')
+                frame = frame.f_back
+            stack.append(f'{self.name}.{self._labels[-1]}')
+            self.samples[';'.join(reversed(stack))] += 1
+
+
+def section(profiler, label):
+    """Profile a block under label, or do nothing when profiling is off."""
+    return profiler.section(label) if profiler else nullcontext()
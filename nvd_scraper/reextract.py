@@ -0,0 +1,88 @@
+"""Rerun a spider's extraction callbacks over the response archive, without network.
+
+    python -m nvd_scraper.reextract adobe_security_advisory --processes 8
+
+Archived responses are split into chunks and parsed in a process pool. The
+items come back in archive order and are written through the spider's own
+closed(), so the output file is the one a live crawl would have produced.
+"""
+import argparse
+import logging
+import os
+import sys
+from multiprocessing import Pool
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.project import get_project_settings
+
+from nvd_scraper.archive import ResponseArchive
+from nvd_scraper.registry import load_spider
+
+CHUNKS_PER_PROCESS = 4
+
+
+def extract(task):
+    """Run the callbacks for one chunk of manifest entries and return the items they produce."""
+    spider_name, archive_dir, entries = task
+    spider = load_spider(spider_name)()
+    archive = ResponseArchive(archive_dir)
+    items = []
+    for entry in entries:
+        response = HtmlResponse(
+            url=entry['url'],
+            body=archive.get(entry['sha256']),
+            encoding=entry.get('encoding') or 'utf-8',
+            status=entry.get('status', 200),
+            request=Request(entry['url'], meta=entry['meta']),
+        )
+        try:
+            result = getattr(spider, entry['callback'])(response)
+            if isinstance(result, dict):
+                result = [result]
+            for output in result or []:
+                if isinstance(output, dict):
+                    items.append(output)
+        except Exception as e:
+            spider.logger.error(f"Error re-extracting {entry['url']}: {str(e)}")
+    return items
+
+
+def chunked(entries, size):
+    for start in range(0, len(entries), size):
+        yield entries[start:start + size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('spider')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--archive-dir', default=None,
+                        help='defaults to the RESPONSE_ARCHIVE_DIR setting')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+
+    spider_cls = load_spider(args.spider)
+    if not getattr(spider_cls, 'archive_callbacks', None):
+        print(f"{args.spider} does not archive its responses")
+        return 1
+    archive_dir = args.archive_dir or get_project_settings().get('RESPONSE_ARCHIVE_DIR')
+    entries = ResponseArchive(archive_dir).entries(args.spider)
+    if not entries:
+        print(f"No archived responses for {args.spider} in {archive_dir}")
+        return 1
+
+    size = max(1, -(-len(entries) // (args.processes * CHUNKS_PER_PROCESS)))
+    tasks = [(args.spider, archive_dir, chunk) for chunk in chunked(entries, size)]
+    with Pool(args.processes) as pool:
+        items = [item for chunk_items in pool.imap(extract, tasks) for item in chunk_items]
+
+    spider = spider_cls()
+    spider.items = items
+    spider.closed('reextract')
+    print(f"Re-extracted {len(items)} items from {len(entries)} archived responses")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
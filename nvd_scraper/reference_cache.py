@@ -0,0 +1,90 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient, errors
+
+logger = logging.getLogger(__name__)
+
+
+def summary_fingerprint(summary):
+    """Hash an NVD summary so a changed description invalidates the cached entry."""
+    return hashlib.sha1((summary or '').encode('utf-8')).hexdigest()
+
+
+class ReferenceCache:
+    """MongoDB-backed cache of what each NVD detail page told us, keyed by CVE ID.
+
+    Entries hold the description source and the vendor link (or None when the
+    page had no vendor link), so every process that runs the NVD spider can skip
+    detail pages that have already been parsed.
+    """
+
+    def __init__(self, url, db_name, collection_name, ttl_days=30, enabled=True):
+        self.ttl = timedelta(days=ttl_days)
+        self.enabled = enabled
+        self.client = None
+        self.collection = None
+        if enabled:
+            self.client = MongoClient(url, serverSelectionTimeoutMS=5000)
+            self.collection = self.client[db_name][collection_name]
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            settings.get('MONGODB_URL'),
+            settings.get('DB_NAME'),
+            settings.get('NVD_REFERENCE_CACHE_COLLECTION'),
+            ttl_days=settings.getfloat('NVD_REFERENCE_CACHE_TTL_DAYS', 30),
+            enabled=settings.getbool('NVD_REFERENCE_CACHE_ENABLED', True),
+        )
+
+    def get_many(self, cve_ids):
+        """Return cached entries for the given CVE IDs in a single round trip."""
+        if not self.enabled or not cve_ids:
+            return {}
+        try:
+            return {doc['_id']: doc for doc in self.collection.find({'_id': {'$in': list(cve_ids)}})}
+        except errors.PyMongoError as e:
+            self._disable(e)
+            return {}
+
+    def is_fresh(self, entry, summary):
+        """An entry is fresh while it is younger than the TTL and the summary is unchanged."""
+        if not self.is_current(entry, summary):
+            return False
+        return datetime.utcnow() - entry['fetched_at'] < self.ttl
+
+    def is_current(self, entry, summary):
+        """Whether the NVD summary still matches the one the entry was parsed from."""
+        return entry is not None and entry.get('summary_hash') == summary_fingerprint(summary)
+
+    def put(self, cve_id, summary, description_source, org_link, etag=None, last_modified=None):
+        self._write(cve_id, {
+            'summary_hash': summary_fingerprint(summary),
+            'description_source': description_source,
+            'org_link': org_link,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': datetime.utcnow(),
+        })
+
+    def touch(self, cve_id):
+        """Mark an entry as revalidated after NVD answered 304 Not Modified."""
+        self._write(cve_id, {'fetched_at': datetime.utcnow()})
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+
+    def _write(self, cve_id, fields):
+        if not self.enabled:
+            return
+        try:
+            self.collection.update_one({'_id': cve_id}, {'$set': fields}, upsert=True)
+        except errors.PyMongoError as e:
+            self._disable(e)
+
+    def _disable(self, error):
+        logger.warning(f"NVD reference cache unavailable, fetching every detail page: {error}")
+        self.enabled = False
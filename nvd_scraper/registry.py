@@ -0,0 +1,49 @@
+from importlib import import_module
+
+# Spider name -> "module:Class". Nothing is imported until a crawl asks for it, so
+# the read-only API never pays for Scrapy, Twisted or Selenium.
+SPIDERS = {
+    'nvd_spider': 'nvd_scraper.spiders.nvd_spider:NVDSpider',
+    'ibm_vulnerability': 'nvd_scraper.spiders.ibm:IBMVulnerabilitySpider',
+    'qnap_advisory': 'nvd_scraper.spiders.qnap:QNAPAdvisorySpider',
+    'wordfence_vulnerability': 'nvd_scraper.spiders.wordfence:WordFenceVulnerabilitySpider',
+    'microsoft_vulnerability': 'nvd_scraper.spiders.microsoft:MicrosoftVulnerabilitySpider',
+    'cisco_advisory_spider': 'nvd_scraper.spiders.cisco:CiscoAdvisorySpider',
+    'mozilla_security_advisory': 'nvd_scraper.spiders.firefox:MozillaSecurityAdvisorySpider',
+    'adobe_security_advisory': 'nvd_scraper.spiders.adobe_security_spider:AdobeSecurityAdvisorySpider',
+}
+
+# Spiders of the second scraping level, in the order they are scheduled
+VENDOR_SPIDERS = [
+    'ibm_vulnerability',
+    'qnap_advisory',
+    'wordfence_vulnerability',
+    'microsoft_vulnerability',
+    'cisco_advisory_spider',
+    'mozilla_security_advisory',
+    'adobe_security_advisory',
+]
+
+
+def load_spider(name):
+    """Import and return a spider class by its name."""
+    try:
+        module_path, class_name = SPIDERS[name].split(':')
+    except KeyError:
+        raise KeyError(f"Unknown spider: {name}") from None
+    return getattr(import_module(module_path), class_name)
+
+
+def run_crawl(*names):
+    """Run the named spiders in one CrawlerProcess and block until they finish."""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    # Spider classes are passed in directly, so Scrapy's loader does not need to
+    # import every spider module (and Selenium with them) up front.
+    settings.set('SPIDER_MODULES', [])
+    process = CrawlerProcess(settings)
+    for name in names:
+        process.crawl(load_spider(name))
+    process.start()
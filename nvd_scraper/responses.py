@@ -0,0 +1,121 @@
+"""Cached, content-negotiated JSON responses shared by app.py and async_app.py.
+
+Flask and Quart both build on werkzeug's request and response classes, so the
+helpers take the request's query arguments and Accept-Encoding/If-None-Match
+headers and the app's response class; only querying MongoDB differs per app.
+
+A cache entry maps each content coding it has been asked for to its body. The
+ETag depends on the dataset generation (or snapshot), the request and the
+coding, so a matching If-None-Match is answered before any body is produced.
+"""
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+
+class ResponseCache:
+    """Bounded LRU cache of serialized responses with a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def cache_key(generation, path, args):
+    """Key a cached response by dataset generation, endpoint and normalized query parameters."""
+    params = sorted((name, value.strip()) for name, value in args.items(multi=True))
+    return (generation, path, tuple(params))
+
+
+def negotiate_encoding(accept_encodings):
+    """Pick the best content coding the client accepts."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return 'identity'
+
+
+def encode_body(body, encoding):
+    if len(body) < COMPRESS_MIN_SIZE:
+        return body, 'identity'
+    if encoding == 'br':
+        return brotli.compress(body, quality=5), encoding
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6), encoding
+    return body, 'identity'
+
+
+def make_etag(key, encoding):
+    return f"{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()}-{encoding}"
+
+
+def not_modified(response_class, etag):
+    response = response_class('', status=304)
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def encoded_response(response_class, mimetype, variants, preferred, etag):
+    """Respond with the preferred coding of a cached body, encoding and caching it on first use."""
+    if preferred not in variants:
+        variants[preferred] = encode_body(variants['identity'][0], preferred)
+    body, encoding = variants[preferred]
+
+    response = response_class(body, mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def cached_response(response_class, mimetype, cache, key, preferred, if_none_match, produce):
+    """Serve the body of `key` from the cache, or from produce() (bytes) on a miss; 304 on a matching ETag."""
+    etag = make_etag(key, preferred)
+    if if_none_match.contains(etag):
+        return not_modified(response_class, etag)
+
+    variants = cache.get(key)
+    if variants is None:
+        variants = {'identity': (produce(), 'identity')}
+        cache.set(key, variants)
+    return encoded_response(response_class, mimetype, variants, preferred, etag)
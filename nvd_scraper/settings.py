@@ -1,3 +1,5 @@
+import os
+
 BOT_NAME = "nvd_scraper"
 
 SPIDER_MODULES = ["nvd_scraper.spiders"]
@@ -9,9 +11,61 @@ REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 FEED_EXPORT_ENCODING = "utf-8"
 
+MONGODB_URL = os.getenv('MONGODB_URL', 'private')
+DB_NAME = os.getenv('DB_NAME', 'private')
+
+# Shared cache of parsed NVD detail pages, see nvd_scraper/reference_cache.py
+NVD_REFERENCE_CACHE_ENABLED = os.getenv('NVD_REFERENCE_CACHE_ENABLED', '1') == '1'
+NVD_REFERENCE_CACHE_COLLECTION = os.getenv('NVD_REFERENCE_CACHE_COLLECTION', 'nvd_reference_cache')
+NVD_REFERENCE_CACHE_TTL_DAYS = 30
+
+# Per-host circuit breaker with retry budgets, see CircuitBreakerMiddleware.
+# It replaces Scrapy's RetryMiddleware, which retries dead hosts immediately.
+DOWNLOADER_MIDDLEWARES = {
+    'nvd_scraper.middlewares.CircuitBreakerMiddleware': 560,
+    'nvd_scraper.middlewares.ResponseArchiveMiddleware': 580,
+}
+RETRY_ENABLED = False
+CIRCUIT_BREAKER_ENABLED = True
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_COOLDOWN = 30
+CIRCUIT_BREAKER_MAX_COOLDOWN = 600
+CIRCUIT_BREAKER_RETRY_BUDGET = 20
+CIRCUIT_BREAKER_RETRY_TIMES = 3
+CIRCUIT_BREAKER_BACKOFF_BASE = 1
+CIRCUIT_BREAKER_BACKOFF_MAX = 60
+CIRCUIT_BREAKER_RETRY_HTTP_CODES = [500, 502, 503, 504, 522, 524, 408, 429]
+
+# Content-addressed archive of extraction responses, replayed by `python -m nvd_scraper.reextract`
+RESPONSE_ARCHIVE_ENABLED = os.getenv('RESPONSE_ARCHIVE_ENABLED', '1') == '1'
+RESPONSE_ARCHIVE_DIR = os.getenv('RESPONSE_ARCHIVE_DIR', 'data/archive')
+
 # CONCURRENT_REQUESTS = 4
 # DOWNLOAD_DELAY = 2
 # ROBOTSTXT_OBEY = True
 # USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 # HTTPCACHE_ENABLED = False
-# LOG_LEVEL = 'DEBUG'
\ No newline at end of file
+# LOG_LEVEL = 'DEBUG'
+# Opt-in profiling of spider callbacks and item pipelines: SCRAPER_PROFILE=1 or `scrapy crawl ... -s PROFILE_ENABLED=1`.
+# Per-callback .prof files and a collapsed-stack file land in data/profiles/<run>/
+EXTENSIONS = {
+    'nvd_scraper.extensions.ProfilingExtension': 500,
+    'nvd_scraper.extensions.RunDeadlineExtension': 510,
+}
+PROFILE_ENABLED = os.getenv('SCRAPER_PROFILE') == '1'
+PROFILE_CALLBACKS = [
+    'parse',
+    'parse_advisory',
+    'parse_search_results',
+    'parse_cve_details',
+    'parse_rendered',
+    'parse_all_items',
+    'process_item',
+    'closed',
+]
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# Run deadline (Unix time), see RunDeadlineExtension. Unset means no deadline.
+RUN_DEADLINE = float(os.getenv('RUN_DEADLINE') or 0)
+RUN_DEADLINE_MARGIN = 30
+RUN_DEADLINE_SHARE = 1.0
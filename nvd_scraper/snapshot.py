@@ -0,0 +1,202 @@
+"""Immutable read snapshots of the joined vulnerability dataset.
+
+A snapshot is a JSON array of flat vulnerability documents, sorted by vendor
+and CVE ID, plus a sidecar index with the byte range of every document and the
+document range of every vendor. Since each vendor's documents are contiguous,
+any vendor (or the first N documents) is a single slice of the file that is
+already a valid JSON array body once wrapped in brackets.
+
+Snapshots are never modified. The scraper writes one after every ingest,
+uploads both files to a GridFS bucket of the dataset's database and only then
+points the ``snapshot`` document of the meta collection at them, so readers
+either see the old snapshot or the new one. Every API instance, including
+serverless ones with nothing but an ephemeral /tmp, downloads the current
+snapshot into its own SNAPSHOT_DIR once, maps it and serves slices of it.
+
+A snapshot records the dataset generation it was built from, and readers only
+use it while that is still the current generation. Between a generation bump
+and the publish that follows it, or when publishing failed, reads use MongoDB.
+"""
+import json
+import mmap
+import os
+import threading
+import time
+from datetime import datetime
+
+from gridfs.errors import NoFile
+
+POINTER_ID = 'snapshot'
+SUFFIXES = ('.json', '.index.json')
+# Older snapshots kept next to the current one, for readers still mapping them
+KEEP_SNAPSHOTS = 2
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def write_snapshot(directory, docs, generation=None):
+    """Write docs as a new snapshot of a dataset generation and return its name."""
+    os.makedirs(directory, exist_ok=True)
+    encoded = sorted(
+        ((doc.get('description') or '', doc.get('cve_id') or '',
+          json.dumps(doc, separators=(',', ':'), default=encode_value).encode('utf-8'))
+         for doc in docs),
+        key=lambda entry: (entry[0], entry[1])
+    )
+
+    name = f"vulnerabilities-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}"
+    offsets = []
+    cves = {}
+    vendors = {}
+    with open(os.path.join(directory, f'{name}.json'), 'wb') as f:
+        f.write(b'[')
+        position = 1
+        for index, (vendor, cve_id, body) in enumerate(encoded):
+            if index:
+                f.write(b',')
+                position += 1
+            f.write(body)
+            offsets.append([position, len(body)])
+            position += len(body)
+            cves.setdefault(cve_id, index)
+            first, count = vendors.get(vendor, (index, 0))
+            vendors[vendor] = (first, count + 1)
+        f.write(b']')
+        f.flush()
+        os.fsync(f.fileno())
+
+    index = {'generation': generation, 'offsets': offsets, 'cves': cves, 'vendors': vendors}
+    with open(os.path.join(directory, f'{name}.index.json'), 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    prune_snapshots(directory, name)
+    return name
+
+
+def upload_snapshot(bucket, meta, directory, name, generation):
+    """Upload a written snapshot to GridFS, make it the current one and drop the oldest uploads."""
+    for suffix in SUFFIXES:
+        with open(os.path.join(directory, name + suffix), 'rb') as f:
+            bucket.upload_from_stream(name + suffix, f, metadata={'snapshot': name, 'generation': generation})
+    meta.replace_one({'_id': POINTER_ID}, {'name': name, 'generation': generation}, upsert=True)
+
+    uploads = {}
+    for upload in bucket.find({}):
+        uploads.setdefault(upload.metadata['snapshot'], []).append(upload._id)
+    for old in sorted(uploads)[:-KEEP_SNAPSHOTS]:
+        if old != name:
+            for file_id in uploads[old]:
+                bucket.delete(file_id)
+
+
+def download_snapshot(bucket, directory, name):
+    """Fetch the files of a snapshot from GridFS, unless this instance already has them."""
+    os.makedirs(directory, exist_ok=True)
+    for suffix in SUFFIXES:
+        path = os.path.join(directory, name + suffix)
+        if os.path.exists(path):
+            continue
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            bucket.download_to_stream_by_name(name + suffix, f)
+        os.replace(tmp_path, path)
+
+
+def prune_snapshots(directory, current):
+    names = sorted({entry.split('.')[0] for entry in os.listdir(directory) if entry.startswith('vulnerabilities-')})
+    for name in names[:-KEEP_SNAPSHOTS]:
+        if name == current:
+            continue
+        for suffix in ('.json', '.index.json'):
+            try:
+                os.remove(os.path.join(directory, name + suffix))
+            except FileNotFoundError:
+                pass
+
+
+class Snapshot:
+    """A memory-mapped snapshot. Slices are memoryviews into the mapping, nothing is copied."""
+
+    def __init__(self, directory, name):
+        self.name = name
+        with open(os.path.join(directory, f'{name}.index.json')) as f:
+            index = json.load(f)
+        self.generation = index.get('generation')
+        self.offsets = index['offsets']
+        self.cves = index['cves']
+        self.vendors = index['vendors']
+        with open(os.path.join(directory, f'{name}.json'), 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def document(self, cve_id):
+        """The JSON body of one CVE, or None if it is not in the snapshot."""
+        index = self.cves.get(cve_id)
+        if index is None:
+            return None
+        start, length = self.offsets[index]
+        return self._view[start:start + length]
+
+    def documents(self, first, count):
+        """The JSON array of `count` consecutive documents, as chunks of a response body."""
+        count = min(count, len(self.offsets) - first)
+        if count <= 0:
+            return [b'[]']
+        start = self.offsets[first][0]
+        last_start, last_length = self.offsets[first + count - 1]
+        return [b'[', self._view[start:last_start + last_length], b']']
+
+    def vendor_range(self, vendor):
+        """(first document, count) of a vendor, or None if the vendor has no documents."""
+        return self.vendors.get(vendor)
+
+
+class SnapshotReader:
+    """Keeps the snapshot of the current dataset generation mapped, fetching it once per generation.
+
+    When no snapshot matches the generation, GridFS is looked up again at most
+    every `check_interval` seconds, so reads in between go straight to MongoDB.
+    """
+
+    def __init__(self, directory, check_interval=5):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked = (None, 0.0)
+        self._lock = threading.Lock()
+
+    def current(self, generation):
+        """The mapped snapshot if it was built from this generation, else None."""
+        snapshot = self._snapshot
+        if generation is None or snapshot is None or snapshot.generation != generation:
+            return None
+        return snapshot
+
+    def due(self, generation):
+        checked_generation, checked_at = self._checked
+        return checked_generation != generation or time.monotonic() - checked_at >= self.check_interval
+
+    def load(self, bucket, meta, generation):
+        """Map the published snapshot when it was built from this generation; return it or None."""
+        with self._lock:
+            if self.current(generation) is not None or not self.due(generation):
+                return self.current(generation)
+            self._checked = (generation, time.monotonic())
+            pointer = meta.find_one({'_id': POINTER_ID})
+            if pointer is None or pointer.get('generation') != generation:
+                return None
+            name = pointer['name']
+            try:
+                download_snapshot(bucket, self.directory, name)
+                self._snapshot = Snapshot(self.directory, name)
+            except (OSError, ValueError, NoFile) as e:
+                print(f'Could not open snapshot {name}: {e}')
+                return None
+            prune_snapshots(self.directory, name)
+            return self._snapshot
@@ -1,15 +1,38 @@
 import scrapy
-import json
-from datetime import datetime
 from urllib.parse import urljoin
+from nvd_scraper import versions
+from nvd_scraper.extraction import Field, Rows
+from nvd_scraper.spiders.base import VendorSpider
 
-class AdobeSecurityAdvisorySpider(scrapy.Spider):
+# Data rows (header skipped) of the n-th table of an Adobe bulletin:
+# 2 = affected versions, 3 = solution, 4 = vulnerability details
+TABLE_ROWS = ("((//div[contains(concat(' ', normalize-space(@class), ' '), ' dexter-Table-Container ')]"
+              "//table)[{}]//tbody//tr)[position() > 1]")
+
+
+def product_rows(table):
+    return Rows(xpath=TABLE_ROWS.format(table),
+                product=Field(css='td.column-c0 p::text'),
+                version=Field(css='td.column-c1 p::text'))
+
+
+class AdobeSecurityAdvisorySpider(VendorSpider):
     name = 'adobe_security_advisory'
     start_urls = ['https://helpx.adobe.com/in/security/Home.html']
+    output_file = 'adobe_security_advisory_output.json'
+    archive_callbacks = {'parse_advisory': ('title', 'originally_posted', 'last_updated')}
+    rules = {
+        'affected': product_rows(2),
+        'solution': product_rows(3),
+        'cves': Rows(xpath=TABLE_ROWS.format(4),
+                     cve=Field(css='td:contains("CVE") p::text'),
+                     severity=Field(css='td.column-c2 p::text'),
+                     cvss_score=Field(css='td.column-c3 p::text'),
+                     cvss_vector=Field(css='td.column-c4 p::text')),
+    }
     
     def __init__(self, advisories_to_scrape=10, *args, **kwargs):
         super(AdobeSecurityAdvisorySpider, self).__init__(*args, **kwargs)
-        self.items = []
         self.advisories_to_scrape = int(advisories_to_scrape)
         self.advisories_scraped = 0
     
@@ -33,65 +56,35 @@ class AdobeSecurityAdvisorySpider(scrapy.Spider):
             else:
                 break
 
-    def parse_advisory(self, response):
-        title = response.meta['title']
-        originally_posted = response.meta['originally_posted']
-        last_updated = response.meta['last_updated']
-
-        # Extract affected products
+    def build_items(self, values, response, item):
         affected_products = []
-        product_table = response.css('div.dexter-Table-Container table')[1]
-        for row in product_table.css('tbody tr')[1:]:
-            product = row.css('td.column-c0 p::text').get()
-            version = row.css('td.column-c1 p::text').get()
-            if product and version:
-                affected_products.append(f"{product.strip()} {version.strip()}")
+        affected_ranges = []
+        for row in values['affected']:
+            if row['product'] and row['version']:
+                affected_products.append(f"{row['product'].strip()} {row['version'].strip()}")
+                affected_ranges.extend(versions.adobe_ranges(row['product'].strip(), row['version'].strip()))
 
-        # Extract recommendation
         recommendation = ""
-        recommendation_table = response.css('div.dexter-Table-Container table')[2]
-        recommendations_list = []
-        for row in recommendation_table.css('tbody tr')[1:]:
-            product = row.css('td.column-c0 p::text').get()
-            version = row.css('td.column-c1 p::text').get()
-            if product and version:
-                recommendations_list.append(f"{product.strip()} {version.strip()}")
+        recommendations_list = [
+            f"{row['product'].strip()} {row['version'].strip()}"
+            for row in values['solution'] if row['product'] and row['version']
+        ]
         if recommendations_list:
             recommendation = "Update the following products and versions: " + ", ".join(recommendations_list)
 
-        # Extract CVEs and severities
-        cve_table = response.css('div.dexter-Table-Container table')[3]
-        for row in cve_table.css('tbody tr')[1:]:
-            cve = row.css('td:contains("CVE") p::text').get()
-            severity = row.css('td.column-c2 p::text').get()
-
-            if cve and severity:
-                scraped_item = {
-                    'cve_id': cve.strip(),
-                    'published_date': self.format_date(originally_posted),
+        for row in values['cves']:
+            if row['cve'] and row['severity']:
+                yield {
+                    'cve_id': row['cve'].strip(),
+                    'published_date': self.format_date(response.meta['originally_posted']),
                     'description': 'Adobe',
                     'org_link': response.url,
-                    'release_date': self.format_date(last_updated),
-                    'severity': severity.strip().capitalize(),
-                    'summary': title,
+                    'release_date': self.format_date(response.meta['last_updated']),
+                    'severity': row['severity'].strip().capitalize(),
+                    'summary': response.meta['title'],
                     'affected_products': affected_products,
-                    'recommendations': recommendation
+                    'affected_ranges': affected_ranges,
+                    'recommendations': recommendation,
+                    'cvss_score': row['cvss_score'],
+                    'cvss_vector': row['cvss_vector']
                 }
-                
-                self.items.append(scraped_item)
-                yield scraped_item
-
-    def format_date(self, date_string):
-        try:
-            date_obj = datetime.strptime(date_string.strip(), "%B %d, %Y")
-            return date_obj.strftime("%d/%m/%Y")
-        except ValueError:
-            return date_string
-
-    def errback_httpbin(self, failure):
-        self.logger.error(f"Request failed: {failure}")
-
-    def closed(self, reason):
-        with open('data/adobe_security_advisory_output.json', 'w') as f:
-            json.dump(self.items, f, indent=2)
-        self.logger.info(f"Spider closed. Wrote {len(self.items)} items to adobe_security_advisory_output.json")
\ No newline at end of file
@@ -0,0 +1,136 @@
+import json
+import time
+
+import scrapy
+from w3lib.url import canonicalize_url
+
+from nvd_scraper import extraction
+from nvd_scraper.cvss import item_cvss
+from nvd_scraper.extraction import Extractor
+from nvd_scraper.middlewares import RequestDeferred
+from nvd_scraper.priority import group_priority
+
+
+def group_by_advisory(references):
+    """Group NVD references by canonical advisory URL, keeping first-seen order.
+
+    One bulletin often covers many CVEs; grouping lets it be fetched and
+    parsed once and the result fanned out to every CVE.
+    """
+    groups = {}
+    for item in references:
+        groups.setdefault(canonicalize_url(item['org_link']), []).append(item)
+    return groups
+
+
+def prioritized_groups(references):
+    """Advisory groups, most urgent first; groups of equal priority keep first-seen order."""
+    return sorted(group_by_advisory(references).values(), key=group_priority, reverse=True)
+
+
+class VendorSpider(scrapy.Spider):
+    """Shared plumbing of the vendor advisory spiders.
+
+    Subclasses are configurations: ``rules`` maps names to extraction rules for
+    an advisory page, compiled once into ``extractor`` when the class is defined,
+    and ``build_items``, which every subclass must define, turns the extracted
+    values into scraped items, once per NVD reference the page covers. Spiders
+    that follow NVD references set ``reference_filter`` to a substring of the
+    advisory URL; the others start from ``start_urls`` and link to
+    ``parse_advisory`` from their own ``parse``.
+    """
+
+    output_file = None
+    reference_filter = None
+    rules = {}
+    extractor = Extractor({})
+    date_formats = extraction.DATE_FORMATS
+    # Extraction callbacks whose responses are archived, with the meta they read
+    archive_callbacks = {'parse_advisory': ('items',)}
+    # Unix time the spider must stop by, set by RunDeadlineExtension
+    deadline = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Fail when the spider module is imported rather than on its first advisory page
+        if cls.build_items is VendorSpider.build_items:
+            raise TypeError(f"{cls.__name__} must define build_items()")
+        if 'rules' in cls.__dict__:
+            cls.extractor = Extractor(cls.rules)
+
+    def __init__(self, *args, **kwargs):
+        super(VendorSpider, self).__init__(*args, **kwargs)
+        self.items = []
+
+    def load_references(self):
+        """Return the NVD references written by the first scraping level, or None if unavailable."""
+        try:
+            with open('data/all_cves.json', 'r') as f:
+                data = json.load(f)
+            self.logger.info(f"Successfully loaded all_cves.json with {len(data)} items")
+            return data
+        except FileNotFoundError:
+            self.logger.error("all_cves.json file not found. Make sure it exists in the spider's directory.")
+        except json.JSONDecodeError:
+            self.logger.error("Error decoding all_cves.json. Make sure it's valid JSON.")
+        return None
+
+    def is_relevant(self, item):
+        return self.reference_filter in item.get('org_link', '').lower()
+
+    def start_requests(self):
+        if self.reference_filter is None:
+            # Spiders that crawl the vendor's own index start from start_urls
+            yield from super(VendorSpider, self).start_requests()
+            return
+
+        data = self.load_references()
+        if data is None:
+            return
+
+        references = [item for item in data if self.is_relevant(item)]
+        groups = prioritized_groups(references)
+        for items in groups:
+            yield scrapy.Request(url=items[0]['org_link'], callback=self.parse_advisory,
+                                 meta={'items': items}, errback=self.errback_httpbin,
+                                 priority=group_priority(items))
+
+        self.logger.info(f"Generated {len(groups)} requests for {len(references)} references")
+
+    def past_deadline(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def parse_advisory(self, response):
+        self.logger.info(f"Parsing advisory from {response.url}")
+        values = self.extractor.extract(response)
+        # Pages reached from a vendor index carry no NVD references
+        for item in response.meta.get('items', [None]):
+            for scraped_item in self.build_items(values, response, item):
+                scraped_item.update(item_cvss(scraped_item, item))
+                self.items.append(scraped_item)
+                self.logger.info(f"Scraped item for CVE-ID: {scraped_item['cve_id']}")
+                yield scraped_item
+
+    def build_items(self, values, response, item):
+        """Yield the scraped items of one advisory page and NVD reference from the extracted values.
+
+        Items may carry the page's ``cvss_score`` and ``cvss_vector``; the
+        normalized CVSS fields are filled in from them by parse_advisory.
+        """
+
+    def format_date(self, date_string):
+        return extraction.format_date(date_string, self.date_formats)
+
+    def errback_httpbin(self, failure):
+        if failure.check(RequestDeferred):
+            # Parked by the circuit breaker and scheduled again once its host recovers
+            self.crawler.stats.inc_value('vendor/requests_deferred')
+            self.logger.debug(f"Request deferred by the circuit breaker: {failure.request.url}")
+            return
+        self.crawler.stats.inc_value('vendor/requests_failed')
+        self.logger.error(f"Request failed: {failure}")
+
+    def closed(self, reason):
+        with open(f'data/{self.output_file}', 'w') as f:
+            json.dump(self.items, f, indent=2)
+        self.logger.info(f"Spider closed. Wrote {len(self.items)} items to {self.output_file}")
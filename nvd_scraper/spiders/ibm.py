@@ -1,138 +1,100 @@
-import scrapy
-import json
+import re
+
 from w3lib.html import remove_tags
-from datetime import datetime
+from nvd_scraper.cvss import VECTOR_PATTERN, base_score
+from nvd_scraper.extraction import Field
+from nvd_scraper.spiders.base import VendorSpider
+
+DETAILS = 'div.field--name-field-vulnerability-details'
+AFFECTED_ROWS = 'div.field--name-field-affected-products table tbody tr'
+
+
+def severity_from_text(severity_text):
+    severity_text = severity_text.lower()
+    for severity in ('Critical', 'High', 'Medium', 'Low'):
+        if severity.lower() in severity_text:
+            return severity
+    return None
+
+
+def severity_from_scores(cvss_scores):
+    max_score = max(float(score) for score in cvss_scores)
+    if max_score >= 9.0:
+        return "Critical"
+    elif max_score >= 7.0:
+        return "High"
+    elif max_score >= 4.0:
+        return "Medium"
+    return "Low"
+
+
+def cve_details(details, cve_id):
+    """The part of a bulletin's vulnerability details about one CVE, or all of them if it is not named."""
+    start = details.find(cve_id) if cve_id else -1
+    if start == -1:
+        return details
+    end = details.find('CVEID', start + len(cve_id))
+    return details[start:end] if end != -1 else details[start:]
 
-class IBMVulnerabilitySpider(scrapy.Spider):
+
+def cvss_from_details(details):
+    """(base score, vector) listed in vulnerability details; the highest score when there are several."""
+    scores = [float(score) for score in re.findall(r'CVSS Base score:\s*(\d+\.\d+)', details)]
+    vector = max(VECTOR_PATTERN.findall(details), key=lambda vector: base_score(vector) or 0, default=None)
+    return (max(scores) if scores else None), vector
+
+
+class IBMVulnerabilitySpider(VendorSpider):
     name = 'ibm_vulnerability'
-    
-    def __init__(self, *args, **kwargs):
-        super(IBMVulnerabilitySpider, self).__init__(*args, **kwargs)
-        self.items = []
-    
-    def start_requests(self):
-        try:
-            with open('data/all_cves.json', 'r') as f:
-                data = json.load(f)
-            self.logger.info(f"Successfully loaded all_cves.json with {len(data)} items")
-        except FileNotFoundError:
-            self.logger.error("all_cves.json file not found. Make sure it exists in the spider's directory.")
-            return
-        except json.JSONDecodeError:
-            self.logger.error("Error decoding all_cves.json. Make sure it's valid JSON.")
-            return
-        
-        request_count = 0
-        for item in data:
-            # Check if the URL is an IBM URL
-            if 'ibm' in item.get('org_link', '').lower():
-                yield scrapy.Request(url=item['org_link'], callback=self.parse, meta={'item': item}, errback=self.errback_httpbin)
-                request_count += 1
-        
-        self.logger.info(f"Generated {request_count} requests")
-
-    def parse(self, response):
-        self.logger.info(f"Parsing response from {response.url}")
-        item = response.meta['item']
-
-        cve_ids = response.css('div.field--name-field-vulnerability-details a::text').getall()
-        published_date = response.css('div.field--name-field-change-history::text').get()
-        if published_date:
-            published_date = published_date.split(':')[-1].strip()
-        
-        severity = self.get_severity(response)
-        summary = response.css('div.field--name-field-summary p::text').get()
-
-        affected_products = response.css('div.field--name-field-affected-products table tbody tr').getall()
-        affected_products = [remove_tags(product).strip() for product in affected_products]
-
-        # Extract product name, platform, and fix link
-        product_name = response.css('div.field--name-field-affected-products table tbody tr td:first-child::text').get()
-        platform = response.css('div.field--name-field-affected-products table tbody tr td:nth-child(2)::text').get()
-        fix_link = response.css('div.field--name-field-remediation-fixes a::attr(href)').get()
+    reference_filter = 'ibm'
+    output_file = 'ibm_vulnerabilities_output.json'
+    rules = {
+        'published_date': Field(css='div.field--name-field-change-history::text',
+                                post=lambda text: text.split(':')[-1].strip()),
+        # Look for severity information in multiple locations
+        'severity_text': Field(css=f'{DETAILS}::text', fallback=Field(css=f'{DETAILS} span::text')),
+        'cvss_scores': Field(css=f'{DETAILS}::text', many=True, re=r'CVSS Base score: (\d+\.\d+)',
+                             fallback=Field(css=f'{DETAILS} span::text', many=True, re=r'(\d+\.\d+)')),
+        'details': Field(css=f'{DETAILS} ::text', join='\n'),
+        'summary': Field(css='div.field--name-field-summary p::text'),
+        'affected_products': Field(css=AFFECTED_ROWS, many=True, post=lambda row: remove_tags(row).strip()),
+        'product_name': Field(css=f'{AFFECTED_ROWS} td:first-child::text'),
+        'platform': Field(css=f'{AFFECTED_ROWS} td:nth-child(2)::text'),
+        'fix_link': Field(css='div.field--name-field-remediation-fixes a::attr(href)'),
+    }
+
+    def build_items(self, values, response, item):
+        published_date = values['published_date']
 
         # Create recommendation sentence
+        product_name, platform, fix_link = values['product_name'], values['platform'], values['fix_link']
         if product_name and platform and fix_link:
             recommendations = f"For {product_name} on {platform} platforms, it is recommended to apply the latest fix, which can be downloaded from the IBM Fix Central website: {fix_link}"
         else:
             recommendations = "It is recommended to apply the fix as soon as possible, see the IBM security bulletin for more details."
 
-        scraped_item = {
-            'cve_id':  item.get('cve_id'),
+        cvss_score, cvss_vector = cvss_from_details(cve_details(values['details'], item.get('cve_id')))
+        severity = self.get_severity(values)
+
+        yield {
+            'cve_id': item.get('cve_id'),
             'published_date': self.format_date(published_date) if published_date else self.format_date(item.get('published_date')),
             'description': "IBM",
             'org_link': response.url,
             'release_date': self.format_date(published_date) if published_date else self.format_date(item.get('release_date')),
-            'severity': severity or item.get('severity'),
-            'summary': summary or item.get('summary'),
-            'affected_products': affected_products,
-            'recommendations': recommendations
+            # If no severity is found, default to "Medium", but do not rank the CVE as such
+            'severity': severity or "Medium",
+            'severity_level': None if severity else 'unknown',
+            'summary': values['summary'] or item.get('summary'),
+            'affected_products': values['affected_products'],
+            'recommendations': recommendations,
+            'cvss_score': cvss_score,
+            'cvss_vector': cvss_vector
         }
-        
-        self.items.append(scraped_item)
-        self.logger.info(f"Scraped item for CVE-IDs: {scraped_item['cve_id']}")
-        yield scraped_item
-
-    def get_severity(self, response):
-        # Look for severity information in multiple locations
-        severity_text = response.css('div.field--name-field-vulnerability-details::text').get()
-        if not severity_text:
-            severity_text = response.css('div.field--name-field-vulnerability-details span::text').get()
-        
-        if severity_text:
-            severity_text = severity_text.lower()
-            if 'critical' in severity_text:
-                return "Critical"
-            elif 'high' in severity_text:
-                return "High"
-            elif 'medium' in severity_text:
-                return "Medium"
-            elif 'low' in severity_text:
-                return "Low"
-        
-        # If no direct severity text found, try to extract CVSS score
-        cvss_scores = response.css('div.field--name-field-vulnerability-details::text').re(r'CVSS Base score: (\d+\.\d+)')
-        if not cvss_scores:
-            cvss_scores = response.css('div.field--name-field-vulnerability-details span::text').re(r'(\d+\.\d+)')
-
-        if cvss_scores:
-            max_score = max(float(score) for score in cvss_scores)
-            if max_score >= 9.0:
-                return "Critical"
-            elif max_score >= 7.0:
-                return "High"
-            elif max_score >= 4.0:
-                return "Medium"
-            else:
-                return "Low"
-        
-        # If no severity is found, default to "Medium"
-        return "Medium"
 
-    def format_date(self, date_string):
-        if not date_string:
-            return None
-        try:
-            # First, try to parse the input date string as "September 03, 2024; 12:00:00 AM -0400"
-            date_obj = datetime.strptime(date_string.strip(), "%B %d, %Y; %I:%M:%S %p -0400")
-            return date_obj.strftime("%d/%m/%Y")
-        except ValueError:
-            try:
-                # If that fails, try to parse it as "%B %d, %Y"
-                date_obj = datetime.strptime(date_string.strip(), "%B %d, %Y")
-                return date_obj.strftime("%d/%m/%Y")
-            except ValueError:
-                try:
-                    # If that fails, try to parse it as "%d %b %Y"
-                    date_obj = datetime.strptime(date_string.strip(), "%d %b %Y")
-                    return date_obj.strftime("%d/%m/%Y")
-                except ValueError:
-                    return date_string  # Return the original string if parsing fails
-
-    def errback_httpbin(self, failure):
-        self.logger.error(f"Request failed: {failure}")
-
-    def closed(self, reason):
-        with open('data/ibm_vulnerabilities_output.json', 'w') as f:
-            json.dump(self.items, f, indent=2)
-        self.logger.info(f"Spider closed. Wrote {len(self.items)} items to ibm_vulnerabilities_output.json")
+    def get_severity(self, values):
+        severity = severity_from_text(values['severity_text']) if values['severity_text'] else None
+        # If no direct severity text found, fall back to the CVSS score
+        if severity is None and values['cvss_scores']:
+            severity = severity_from_scores(values['cvss_scores'])
+        return severity
@@ -7,21 +7,32 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import json
 from datetime import datetime
+from nvd_scraper.cvss import find_vector, item_cvss
+from nvd_scraper.priority import group_priority
+from nvd_scraper.spiders.base import prioritized_groups
 
 class MicrosoftVulnerabilitySpider(scrapy.Spider):
     name = 'microsoft_vulnerability'
+    # Rendered pages are archived by parse(), see parse_rendered
+    archive_callbacks = {'parse_rendered': ('items',)}
     
     def __init__(self, *args, **kwargs):
         super(MicrosoftVulnerabilitySpider, self).__init__(*args, **kwargs)
         self.items = []
-        
-        # Set up Selenium
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--window-size=1920,1080")
-        self.driver = webdriver.Chrome(options=chrome_options)
+        self._driver = None
+
+    @property
+    def driver(self):
+        # Chrome is only started once a page actually needs rendering, so
+        # re-extraction from the archive never launches a browser
+        if self._driver is None:
+            chrome_options = Options()
+            chrome_options.add_argument("--headless")
+            chrome_options.add_argument("--disable-gpu")
+            chrome_options.add_argument("--no-sandbox")
+            chrome_options.add_argument("--window-size=1920,1080")
+            self._driver = webdriver.Chrome(options=chrome_options)
+        return self._driver
     
     def start_requests(self):
         try:
@@ -35,16 +46,16 @@ class MicrosoftVulnerabilitySpider(scrapy.Spider):
             self.logger.error("Error decoding all_cves.json. Make sure it's valid JSON.")
             return
         
-        request_count = 0
-        for item in data:
-            if 'microsoft.com' in item.get('org_link', '').lower():
-                yield scrapy.Request(url=item['org_link'], callback=self.parse, meta={'item': item}, dont_filter=True)
-                request_count += 1
+        # Each update guide page is rendered once for all the CVEs that link to it
+        references = [item for item in data if 'microsoft.com' in item.get('org_link', '').lower()]
+        groups = prioritized_groups(references)
+        for items in groups:
+            yield scrapy.Request(url=items[0]['org_link'], callback=self.parse, meta={'items': items},
+                                 priority=group_priority(items))
         
-        self.logger.info(f"Generated {request_count} requests")
+        self.logger.info(f"Generated {len(groups)} requests for {len(references)} references")
 
     def parse(self, response):
-        item = response.meta['item']
         self.driver.get(response.url)
         
         # Wait for multiple elements to be present
@@ -65,8 +76,13 @@ class MicrosoftVulnerabilitySpider(scrapy.Spider):
         
         # Get the page source after JavaScript has rendered the content
         page_source = self.driver.page_source
-        sel_response = HtmlResponse(url=response.url, body=page_source, encoding='utf-8')
-        
+        sel_response = HtmlResponse(url=response.url, body=page_source, encoding='utf-8', request=response.request)
+        archive = getattr(self, 'response_archive', None)
+        if archive:
+            archive.record(self, sel_response, 'parse_rendered')
+        yield from self.parse_rendered(sel_response)
+
+    def parse_rendered(self, sel_response):
         # Extract summary
         summary = self.safe_extract(sel_response, 'h1.ms-fontWeight-semibold::text')
         self.logger.info(f"Extracted summary: {summary}")
@@ -82,26 +98,32 @@ class MicrosoftVulnerabilitySpider(scrapy.Spider):
         
         # Extract recommendations
         recommendations = self.safe_extract(sel_response, 'div.root-144::text')
+
+        # The update guide shows the CVSS vector string of the base score
+        cvss_vector = find_vector(sel_response.text)
         
-        # Convert published_date to dd/mm/yyyy format
-        published_date = item.get('published_date')
-        formatted_date = self.format_date(published_date)
-        
-        scraped_item = {
-            'cve_id': item.get('cve_id'),
-            'published_date': formatted_date,
-            'description': "Microsoft",
-            'org_link': response.url,
-            'release_date': formatted_date,
-            'severity': severity,
-            'summary': summary,
-            'affected_products': affected_products,
-            'recommendations': recommendations
-        }
-        
-        self.items.append(scraped_item)
-        self.logger.info(f"Scraped item for CVE-ID: {scraped_item['cve_id']}")
-        yield scraped_item
+        for item in sel_response.meta['items']:
+            # Convert published_date to dd/mm/yyyy format
+            published_date = item.get('published_date')
+            formatted_date = self.format_date(published_date)
+            
+            scraped_item = {
+                'cve_id': item.get('cve_id'),
+                'published_date': formatted_date,
+                'description': "Microsoft",
+                'org_link': sel_response.url,
+                'release_date': formatted_date,
+                'severity': severity,
+                'summary': summary,
+                'affected_products': affected_products,
+                'recommendations': recommendations,
+                'cvss_vector': cvss_vector
+            }
+            scraped_item.update(item_cvss(scraped_item, item))
+            
+            self.items.append(scraped_item)
+            self.logger.info(f"Scraped item for CVE-ID: {scraped_item['cve_id']}")
+            yield scraped_item
 
     def safe_extract(self, response, selector, method='get', pattern=None):
         try:
@@ -127,7 +149,8 @@ class MicrosoftVulnerabilitySpider(scrapy.Spider):
             return date_string
 
     def closed(self, reason):
-        self.driver.quit()
+        if self._driver is not None:
+            self._driver.quit()
         with open('data/microsoft_vulnerabilities_output.json', 'w') as f:
             json.dump(self.items, f, indent=2)
         self.logger.info(f"Spider closed. Wrote {len(self.items)} items to microsoft_vulnerabilities_output.json")
\ No newline at end of file
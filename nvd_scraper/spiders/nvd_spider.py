@@ -4,21 +4,51 @@ from urllib.parse import urlencode
 from datetime import datetime
 import logging
 import json
+from nvd_scraper.cvss import parse_score
+from nvd_scraper.priority import cve_priority
+from nvd_scraper.reference_cache import ReferenceCache
+from nvd_scraper.vendor_matcher import VendorMatcher, find_cpes, is_vendor_link
 
 class NVDSpider(scrapy.Spider):
     name = 'nvd_spider'
     allowed_domains = ['nvd.nist.gov']
     base_url = 'https://nvd.nist.gov/vuln/search/results'
+    page_size = 20
+    # Above any CVE priority, so discovery finishes before detail pages are fetched
+    search_page_priority = 1000
+    custom_settings = {
+        # Discovery may use this share of the time left in the run, the vendor spiders get the rest
+        'RUN_DEADLINE_SHARE': 0.4,
+        # NVD rate limits unauthenticated clients hardest of all the sources, and
+        # every search page after the first is scheduled at once: keep at most two
+        # requests in flight, a second apart, and back off further when it slows down
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 2,
+        'DOWNLOAD_DELAY': 1,
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_START_DELAY': 1,
+        'AUTOTHROTTLE_MAX_DELAY': 30,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 1.0,
+    }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, max_pages=1, search_type='last3months', record_relevance=None, *args, **kwargs):
         super(NVDSpider, self).__init__(*args, **kwargs)
         self.start_time = datetime.now()
         logging.getLogger('scrapy').setLevel(logging.INFO)
         self.logger.setLevel(logging.INFO)
         self.results = []
-        self.page_count = 0
-        self.max_pages = 1
-        self.target_orgs = ['ibm', 'qnap', 'word', 'adobe', 'microsoft', 'windows', "mac", "apple", "cisco"]  # Convert these to lowercase
+        self.max_pages = int(max_pages)  # 0 scrapes every page of the search
+        self.search_type = search_type
+        self.vendor_matcher = VendorMatcher()
+        # Path of a JSON lines sample: every CVE's details are fetched and its outcome
+        # recorded, so benchmarks/vendor_matcher.py can measure precision and recall
+        self.record_relevance = record_relevance
+        self.reference_cache = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(NVDSpider, cls).from_crawler(crawler, *args, **kwargs)
+        spider.reference_cache = ReferenceCache.from_settings(crawler.settings)
+        return spider
 
     def start_requests(self):
         yield self.get_page_request(0)
@@ -29,18 +59,25 @@ class NVDSpider(scrapy.Spider):
             'isCpeNameSearch': 'false',
             'results_type': 'overview',
             'form_type': 'Basic',
-            'search_type': 'last3months',
+            'search_type': self.search_type,
             'startIndex': start_index
         }
         url = f"{self.base_url}?{urlencode(params)}"
-        return Request(url, self.parse_search_results, meta={'start_index': start_index})
+        return Request(url, self.parse_search_results, meta={'start_index': start_index},
+                       priority=self.search_page_priority)
+
+    def page_limit(self, total_results):
+        pages = -(-total_results // self.page_size)
+        return min(pages, self.max_pages) if self.max_pages else pages
 
     def parse_search_results(self, response):
         self.logger.info(f"Parsing search results from: {response.url}")
         cve_rows = response.css("tbody tr")
         self.logger.info(f"Found {len(cve_rows)} CVE rows on this page")
         
-        for row in cve_rows:
+        start_index = response.meta['start_index']
+        relevant = []
+        for position, row in enumerate(cve_rows):
             cve_link = row.css("a[data-testid^='vuln-detail-link-']")
             if cve_link:
                 cve_id = cve_link.css("::text").get().strip()
@@ -49,32 +86,80 @@ class NVDSpider(scrapy.Spider):
                 if published_date:
                     published_date = published_date.strip()
                 
-                # Extract and check the summary
+                # Extract and check the summary, plus any CPE names listed with it
                 summary = row.css("p[data-testid^='vuln-summary-']::text").get()
                 if summary:
                     summary = summary.strip().lower()
-                    if any(org in summary for org in self.target_orgs):
-                        self.logger.info(f"Found relevant CVE: {cve_id}, Summary: {summary[:50]}...")
-                        yield Request(cve_url, self.parse_cve_details, meta={
+                    cpes = find_cpes(row.get())
+                    vendors = self.vendor_matcher.match(summary, cpes)
+                    if self.record_relevance or vendors:
+                        cvss = parse_score(row.css("[data-testid^='vuln-cvss3-link-']::text").get()
+                                          or row.css("[data-testid^='vuln-cvss2-link-']::text").get())
+                        relevant.append((cve_url, {
                             'cve_id': cve_id,
                             'published_date': published_date,
-                            'summary': summary
-                        })
+                            'summary': summary,
+                            'cpes': cpes,
+                            'cvss': cvss,
+                            'priority': cve_priority(summary, vendors, cvss),
+                            'order': (start_index, position)
+                        }))
                     else:
+                        self.crawler.stats.inc_value('nvd_relevance/skipped')
                         self.logger.info(f"Skipping CVE: {cve_id} - Not relevant to target organizations")
+
+        # Look up every relevant CVE of the page in the reference cache at once
+        cached = self.reference_cache.get_many([meta['cve_id'] for _, meta in relevant]) if self.reference_cache else {}
+        for cve_url, meta in relevant:
+            cve_id, summary = meta['cve_id'], meta['summary']
+            entry = cached.get(cve_id)
+            if entry and self.reference_cache.is_fresh(entry, summary):
+                self.logger.info(f"Using cached references for CVE: {cve_id}")
+                self.crawler.stats.inc_value('nvd_reference_cache/hit')
+                self.record_result(meta, entry.get('description_source'), entry.get('org_link'))
+                continue
+
+            headers = {}
+            if entry and self.reference_cache.is_current(entry, summary):
+                # Expired but unmodified on NVD's side: revalidate instead of re-downloading
+                meta['cached_entry'] = entry
+                meta['handle_httpstatus_list'] = [304]
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+                self.crawler.stats.inc_value('nvd_reference_cache/revalidate')
+            else:
+                self.crawler.stats.inc_value('nvd_reference_cache/miss')
+            self.logger.info(f"Found relevant CVE: {cve_id}, Summary: {summary[:50]}...")
+            # Severe CVEs are resolved first, so a run cut short by its deadline keeps them
+            yield Request(cve_url, self.parse_cve_details, meta=meta, headers=headers, priority=meta['priority'])
         
-        self.page_count += 1
 
-        if self.page_count < self.max_pages:
-            start_index = response.meta['start_index'] + 20
-            yield self.get_page_request(start_index)
+        if start_index != 0:
+            return
+        # The first page tells how many results the search has, so every other
+        # page can be requested at once and fetched concurrently
+        total_results = response.css("strong[data-testid='vuln-matching-records-count']::text").get()
+        if total_results:
+            pages = self.page_limit(int(total_results.replace(',', '').strip()))
+            self.logger.info(f"Search has {total_results.strip()} results, requesting {pages} pages")
+            for page in range(1, pages):
+                yield self.get_page_request(page * self.page_size)
         else:
-            self.logger.info("Reached the maximum number of pages to scrape")
+            self.logger.warning("Could not read the number of search results, only the first page was scraped")
 
     def parse_cve_details(self, response):
         cve_id = response.meta['cve_id']
-        published_date = response.meta['published_date']
         summary = response.meta['summary']
+
+        if response.status == 304:
+            entry = response.meta['cached_entry']
+            self.logger.info(f"Cached references for {cve_id} are still valid")
+            self.reference_cache.touch(cve_id)
+            self.record_result(response.meta, entry.get('description_source'), entry.get('org_link'))
+            return
+
         self.logger.info(f"Parsing details for CVE: {cve_id}")
         
         description_source = response.css("span[data-testid='vuln-current-description-source']::text").get()
@@ -94,33 +179,61 @@ class NVDSpider(scrapy.Spider):
             if links:
                 external_links.extend(links)
         
-        org_link = next((link for link in external_links if 
-                         'qnap' in link.lower() or 
-                         'ibm.com' in link.lower() or 
-                         'cisco.com' in link.lower() or 
-                         'wordfence' in link.lower() or 
-                         'microsoft.com' in link.lower()), None)
-        
+        org_link = next((link for link in external_links if is_vendor_link(link)), None)
+
+        if self.reference_cache:
+            # Pages without a vendor link are cached too, so they are not fetched again
+            self.reference_cache.put(
+                cve_id, summary, description_source, org_link,
+                etag=self.header_value(response, 'ETag'),
+                last_modified=self.header_value(response, 'Last-Modified')
+            )
+        self.record_result(response.meta, description_source, org_link)
+
+    def record_result(self, meta, description_source, org_link):
+        cve_id = meta['cve_id']
+        if self.record_relevance:
+            self.record_sample(meta, org_link)
         if org_link:
             self.logger.info(f"Found relevant link for {cve_id}: {org_link}")
             result = {
                 'cve_id': cve_id,
-                'published_date': published_date,
+                'published_date': meta['published_date'],
                 'description_source': description_source,
                 'org_link': org_link,
-                'summary': summary
+                'summary': meta['summary'],
+                'cvss': meta.get('cvss'),
+                'priority': meta.get('priority', 0)
             }
-            self.results.append(result)
+            self.results.append((meta['order'], result))
         else:
             self.logger.info(f"No relevant link found for {cve_id}")
 
+    def record_sample(self, meta, org_link):
+        sample = {
+            'cve_id': meta['cve_id'],
+            'summary': meta['summary'],
+            'cpes': meta.get('cpes', []),
+            'org_link': org_link,
+        }
+        with open(self.record_relevance, 'a') as f:
+            f.write(json.dumps(sample) + '\n')
+
+    def header_value(self, response, name):
+        value = response.headers.get(name)
+        return value.decode('latin-1') if value else None
+
     def closed(self, reason):
         end_time = datetime.now()
         duration = end_time - self.start_time
         self.logger.info(f"Total time taken: {duration.total_seconds():.2f} seconds")
+        if self.reference_cache:
+            self.reference_cache.close()
         
+        # Pages and detail requests complete in any order; write results in search order
+        results = [result for _, result in sorted(self.results, key=lambda entry: entry[0])]
         with open('data/all_cves.json', 'w') as f:
-            json.dump(self.results, f, indent=2)
+            json.dump(results, f, indent=2)
         
         self.logger.info(f"Results written to all_cves.json")
 
@@ -1,107 +1,83 @@
 import scrapy
-import json
-from w3lib.html import remove_tags
 from scrapy.http import HtmlResponse
 import requests
-from datetime import datetime
+from w3lib.html import remove_tags
+from nvd_scraper import versions
+from nvd_scraper.extraction import Field, Rows, strip
+from nvd_scraper.spiders.base import VendorSpider, prioritized_groups
+
+
+def section(title):
+    """The elements between an <h3> containing `title` and the next <h3>."""
+    return (f'//h3[contains(text(), "{title}")]/following-sibling::*[not(self::h3)]'
+            f'[preceding-sibling::h3[1][contains(text(), "{title}")]]')
 
-class QNAPAdvisorySpider(scrapy.Spider):
+
+class QNAPAdvisorySpider(VendorSpider):
     name = 'qnap_advisory'
-    
-    def __init__(self, *args, **kwargs):
-        super(QNAPAdvisorySpider, self).__init__(*args, **kwargs)
-        self.items = []  # List to store all scraped items
+    output_file = 'qnap_advisories_output.json'
+    rules = {
+        'release_date': Field(css='p.fs-6.mb-0::text', re=r'Release date : (.+)'),
+        'severity': Field(css='div.w-md-auto h4::text'),
+        'summary': Field(xpath=section('Summary'), join='', post=lambda html: remove_tags(html).strip()),
+        'recommendations': Field(xpath=section('Recommendation'), join='', post=lambda html: remove_tags(html).strip()),
+        'products': Rows(css='table.table-bordered tbody tr',
+                         affected_product=Field(css='td:nth-child(1)::text', post=strip),
+                         fixed_version=Field(css='td:nth-child(2)::text', post=strip)),
+    }
     
     def start_requests(self):
-        try:
-            with open('data/all_cves.json', 'r') as f:
-                self.data = json.load(f)
-            self.logger.info(f"Successfully loaded all_cves.json with {len(self.data)} items")
-        except FileNotFoundError:
-            self.logger.error("all_cves.json file not found. Make sure it exists in the spider's directory.")
-            return
-        except json.JSONDecodeError:
-            self.logger.error("Error decoding all_cves.json. Make sure it's valid JSON.")
+        self.data = self.load_references()
+        if self.data is None:
             return
         
         # Yield a single dummy request to trigger the spider
         yield scrapy.Request(url='https://example.com', callback=self.parse_all_items)
 
     def parse_all_items(self, response):
-        for item in self.data:
-            if 'QNAP' in item.get('description_source', ''):
-                self.logger.info(f"Processing item for URL: {item['org_link']}")
-                yield self.process_item(item)
-
-    def process_item(self, item):
-        try:
-            # Make a direct request to the URL
-            response = requests.get(item['org_link'])
-            html_response = HtmlResponse(url=item['org_link'], body=response.content, encoding='utf-8')
-            
-            release_date = html_response.css('p.fs-6.mb-0::text').re_first(r'Release date : (.+)')
-            release_date = self.format_date(release_date)
-            severity = html_response.css('div.w-md-auto h4::text').get()
-            
-            summary = self.extract_section(html_response, 'Summary')
-            description = item['description_source']  # Use the description from the input data
-            recommendations = self.extract_section(html_response, 'Recommendation')
-
-            # Extract affected products and fixed versions
-            product_rows = html_response.css('table.table-bordered tbody tr')
-            affected_products_and_versions = []
-            for row in product_rows:
-                affected_product = row.css('td:nth-child(1)::text').get().strip()
-                fixed_version = row.css('td:nth-child(2)::text').get().strip()
-                affected_products_and_versions.append(f'"{affected_product}" fix-version="{fixed_version}"')
-
-            published_date = self.format_date(item['published_date'])
-
-            scraped_item = {
-                'cve_id': item['cve_id'],
-                'published_date': published_date,
-                'description': description,
-                'org_link': item['org_link'],
-                'release_date': release_date,
-                'severity': severity,
-                'summary': summary,
-                'affected_products': affected_products_and_versions,  # Now this is an array
-                'recommendations': recommendations
-            }
-            
-            self.items.append(scraped_item)
-            self.logger.info(f"Scraped item for CVE-ID: {scraped_item['cve_id']}")
-            return scraped_item
-        except Exception as e:
-            self.logger.error(f"Error processing item {item['cve_id']}: {str(e)}")
-            return None
-
-    def extract_section(self, response, section_title):
-        section = response.xpath(f'//h3[contains(text(), "{section_title}")]/following-sibling::*')
-        content = []
-        for element in section:
-            if element.xpath('name()').get() == 'h3':
+        references = [item for item in self.data if 'QNAP' in item.get('description_source', '')]
+        # Advisories are fetched one after the other here, most urgent first
+        for items in prioritized_groups(references):
+            if self.past_deadline():
+                self.logger.warning("Run deadline reached, skipping the remaining QNAP advisories")
                 break
-            content.append(element.get())
-        return remove_tags(''.join(content)).strip()
+            self.logger.info(f"Processing {len(items)} items for URL: {items[0]['org_link']}")
+            yield from self.process_item(items)
 
-    def format_date(self, date_string):
+    def process_item(self, items):
+        url = items[0]['org_link']
         try:
-            # Try parsing with different formats
-            for fmt in ("%Y-%m-%d", "%B %d, %Y"):
-                try:
-                    date_object = datetime.strptime(date_string, fmt)
-                    return date_object.strftime("%d/%m/%Y")
-                except ValueError:
-                    continue
-            
-            # If no format matches, raise an exception
-            raise ValueError(f"Unable to parse date: {date_string}")
+            # Make a direct request to the URL, once for every CVE the advisory covers
+            response = requests.get(url)
+            html_response = HtmlResponse(url=url, body=response.content, encoding='utf-8',
+                                         status=response.status_code,
+                                         request=scrapy.Request(url, meta={'items': items}))
+            archive = getattr(self, 'response_archive', None)
+            if archive and response.ok:
+                archive.record(self, html_response, 'parse_advisory')
+            return list(self.parse_advisory(html_response))
         except Exception as e:
-            self.logger.error(f"Error parsing date: {date_string}. Error: {str(e)}")
-            return date_string
+            self.logger.error(f"Error processing {url} for {', '.join(item['cve_id'] for item in items)}: {str(e)}")
+            return []
+
+    def build_items(self, values, response, item):
+        # Extract affected products and fixed versions
+        affected_products_and_versions = []
+        affected_ranges = []
+        for row in values['products']:
+            affected_product, fixed_version = row['affected_product'], row['fixed_version']
+            affected_products_and_versions.append(f'"{affected_product}" fix-version="{fixed_version}"')
+            affected_ranges.extend(versions.qnap_ranges(affected_product, fixed_version))
 
-    def closed(self, reason):
-        with open('data/qnap_advisories_output.json', 'w') as f:
-            json.dump(self.items, f, indent=2)
-        self.logger.info(f"Spider closed. Wrote {len(self.items)} items to qnap_advisories_output.json")
\ No newline at end of file
+        yield {
+            'cve_id': item['cve_id'],
+            'published_date': self.format_date(item['published_date']),
+            'description': item['description_source'],  # Use the description from the input data
+            'org_link': item['org_link'],
+            'release_date': self.format_date(values['release_date']),
+            'severity': values['severity'],
+            'summary': values['summary'],
+            'affected_products': affected_products_and_versions,  # Now this is an array
+            'affected_ranges': affected_ranges,
+            'recommendations': values['recommendations']
+        }
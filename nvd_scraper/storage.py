@@ -0,0 +1,386 @@
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+
+from pymongo import ReplaceOne, ReturnDocument, TEXT, UpdateOne
+
+from nvd_scraper import versions
+
+# Fields that describe the advisory page itself. A CVE reference only stores the
+# ones whose value differs from its advisory (e.g. Adobe's per-CVE severity).
+ADVISORY_FIELDS = ('description', 'org_link', 'published_date', 'release_date',
+                   'severity', 'summary', 'affected_products', 'affected_ranges', 'recommendations')
+# Bookkeeping fields that are not part of the stored content
+INTERNAL_FIELDS = ('_id', 'advisory_id', 'ingested_at', 'seq', 'published_at', 'stats_key')
+
+# Spiders write dd/mm/yyyy, unparseable dates are passed through as scraped
+PUBLISHED_DATE_FORMATS = ('%d/%m/%Y', '%Y-%m-%d', '%B %d, %Y')
+STATS_SORT = [('vendor', 1), ('severity', 1), ('month', 1)]
+
+# Every field the top-K severity query filters, sorts or returns, so it never reads a document
+TOP_SEVERITY_INDEX = [('cvss_score', -1), ('published_at', -1), ('cve_id', 1), ('severity_level', 1)]
+TOP_SEVERITY_FIELDS = ('cve_id', 'cvss_score', 'severity_level', 'published_at')
+
+TEXT_INDEX_FIELDS = [('summary', TEXT), ('affected_products', TEXT), ('recommendations', TEXT)]
+TEXT_INDEX_WEIGHTS = {'summary': 5, 'affected_products': 3, 'recommendations': 1}
+
+
+def advisory_id(org_link):
+    return hashlib.sha1(org_link.strip().lower().encode('utf-8')).hexdigest()
+
+
+def content_hash(doc):
+    content = {field: doc.get(field) for field in ADVISORY_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def normalize(vulnerabilities):
+    """Split scraped items into advisories (one per URL) and per-CVE references."""
+    advisories = {}
+    refs = []
+    for item in vulnerabilities:
+        org_link = item.get('org_link')
+        if not org_link or not item.get('cve_id'):
+            continue
+        key = advisory_id(org_link)
+        advisory = advisories.get(key)
+        if advisory is None:
+            advisory = {field: item.get(field) for field in ADVISORY_FIELDS}
+            advisory['_id'] = key
+            advisory['content_hash'] = content_hash(advisory)
+            advisories[key] = advisory
+
+        ref = {'cve_id': item['cve_id'], 'advisory_id': key}
+        for field in ADVISORY_FIELDS:
+            if field in item and item[field] != advisory[field]:
+                ref[field] = item[field]
+        for field, value in item.items():
+            if field not in ADVISORY_FIELDS and field not in INTERNAL_FIELDS and field not in ref:
+                ref[field] = value
+        refs.append(ref)
+    return advisories, refs
+
+
+def range_documents(advisory):
+    """Flatten an advisory's structured ranges into documents of the product range index."""
+    docs = []
+    for record in advisory.get('affected_ranges') or []:
+        bounds = versions.range_bounds(record)
+        if bounds is None:
+            continue
+        docs.append(dict(
+            record,
+            advisory_id=advisory['_id'],
+            product_key=versions.normalize_product(record['product']),
+            lo_key=bounds[0],
+            hi_key=bounds[1],
+        ))
+    return docs
+
+
+def ensure_indexes(cves, advisories, ranges):
+    """Create the indexes the read endpoints rely on (no-op when they already exist)."""
+    # CVE references carry the text of legacy flat documents and per-CVE overrides
+    for collection in (cves, advisories):
+        collection.create_index(TEXT_INDEX_FIELDS, name='vulnerability_text',
+                                weights=TEXT_INDEX_WEIGHTS, default_language='english')
+    cves.create_index('cve_id')
+    cves.create_index('advisory_id')
+    cves.create_index('ingested_at')
+    cves.create_index('seq')
+    cves.create_index(TOP_SEVERITY_INDEX, name='top_severity')
+    ranges.create_index([('product_key', 1), ('lo_key', 1)])
+    ranges.create_index('advisory_id')
+
+
+def reserve_sequence(meta, count):
+    """Atomically reserve `count` consecutive change sequence numbers and return the first."""
+    doc = meta.find_one_and_update(
+        {'_id': 'change_sequence'}, {'$inc': {'value': count}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return doc['value'] - count + 1
+
+
+def commit_sequence(meta, last_seq):
+    """Publish that every change up to last_seq has been written."""
+    meta.update_one({'_id': 'change_sequence'}, {'$max': {'committed': last_seq}}, upsert=True)
+
+
+def committed_sequence(doc):
+    """The highest sequence number the change feed may return, from the change_sequence document.
+
+    Reserved numbers above it belong to an ingest whose unordered writes may
+    still land out of order, so readers must not page past them.
+    """
+    if not doc:
+        return 0
+    # Documents written before the high-water mark existed only have the reservation
+    return doc.get('committed', doc.get('value', 0))
+
+
+def ingest(cves, advisories, ranges, meta, stats, vulnerabilities):
+    """Store scraped items, writing only advisories and references that changed.
+
+    When an advisory's content changed, the stored references to it that the
+    batch did not include are written again too, since their served documents
+    changed with it. Every written CVE reference is stamped with the next change
+    sequence number, which is what the change feed pages through, and moves its
+    count in the statistics rollups from its previous key to its new one. The
+    block's last number is published as the committed high-water mark only once
+    all of its writes have landed, so the change feed never pages past a gap.
+    Ingests are expected to run one at a time; overlapping ingests could commit
+    sequence numbers out of order.
+
+    Returns the number of advisories written and the flat documents of the CVE
+    references that were written.
+    """
+    advisory_docs, refs = normalize(vulnerabilities)
+    # A CVE scraped twice in one batch is written, sequenced and counted once, as last seen
+    refs = list({ref['cve_id']: ref for ref in refs}.values())
+    ingested_at = datetime.utcnow()
+
+    known_hashes = {
+        doc['_id']: doc.get('content_hash')
+        for doc in advisories.find({'_id': {'$in': list(advisory_docs)}}, {'content_hash': 1})
+    }
+    advisory_writes = []
+    changed_advisories = set()
+    for key, advisory in advisory_docs.items():
+        if known_hashes.get(key) != advisory['content_hash']:
+            advisory['ingested_at'] = ingested_at
+            advisory_writes.append(ReplaceOne({'_id': key}, advisory, upsert=True))
+            changed_advisories.add(key)
+
+    known_refs = {
+        doc['cve_id']: doc
+        for doc in cves.find({'cve_id': {'$in': [ref['cve_id'] for ref in refs]}}, {'_id': 0})
+    }
+    changed_refs = []
+    for ref in refs:
+        known = known_refs.get(ref['cve_id'])
+        unchanged = known is not None and strip_internal(known) == strip_internal(ref) \
+            and known.get('advisory_id') == ref['advisory_id']
+        if unchanged and ref['advisory_id'] not in changed_advisories:
+            continue
+        changed_refs.append(ref)
+    if changed_advisories:
+        # A run can bring back only some of a bulletin's CVEs; the stored ones it
+        # missed serve the advisory's new content too, so they are re-stamped as well
+        batch_ids = [ref['cve_id'] for ref in refs]
+        for known in cves.find({'advisory_id': {'$in': list(changed_advisories)}, 'cve_id': {'$nin': batch_ids}},
+                               {'_id': 0}):
+            known_refs[known['cve_id']] = known
+            changed_refs.append(dict(strip_internal(known), advisory_id=known['advisory_id']))
+
+    ref_writes = []
+    deltas = Counter()
+    if changed_refs:
+        first_seq = reserve_sequence(meta, len(changed_refs))
+        for offset, ref in enumerate(changed_refs):
+            doc = merge(ref, advisory_docs[ref['advisory_id']])
+            ref['ingested_at'] = ingested_at
+            ref['seq'] = first_seq + offset
+            ref['published_at'] = parse_published(doc.get('published_date'))
+            ref['stats_key'] = stats_key(doc)
+            previous_key = (known_refs.get(ref['cve_id']) or {}).get('stats_key')
+            if previous_key != ref['stats_key']:
+                if previous_key:
+                    deltas[previous_key] -= 1
+                deltas[ref['stats_key']] += 1
+            # Replacing by cve_id also converts legacy flat documents into references
+            ref_writes.append(ReplaceOne({'cve_id': ref['cve_id']}, ref, upsert=True))
+
+    if advisory_writes:
+        advisories.bulk_write(advisory_writes, ordered=False)
+        # Rebuild the product ranges of every advisory whose content changed
+        ranges.delete_many({'advisory_id': {'$in': list(changed_advisories)}})
+        range_docs = [doc for key in changed_advisories for doc in range_documents(advisory_docs[key])]
+        if range_docs:
+            ranges.insert_many(range_docs, ordered=False)
+    if ref_writes:
+        cves.bulk_write(ref_writes, ordered=False)
+        commit_sequence(meta, changed_refs[-1]['seq'])
+        apply_stats(stats, deltas)
+    return len(advisory_writes), [merge(ref, advisory_docs[ref['advisory_id']]) for ref in changed_refs]
+
+
+def strip_internal(doc):
+    return {field: value for field, value in doc.items() if field not in INTERNAL_FIELDS}
+
+
+def merge(ref, advisory):
+    """Rebuild the flat vulnerability document of a CVE reference."""
+    doc = {field: advisory.get(field) for field in ADVISORY_FIELDS} if advisory else {}
+    doc.update((field, value) for field, value in ref.items() if field not in ('_id', 'advisory_id', 'stats_key'))
+    return doc
+
+
+def parse_published(published_date):
+    for fmt in PUBLISHED_DATE_FORMATS:
+        try:
+            return datetime.strptime((published_date or '').strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def stats_key(doc):
+    """The vendor|severity|month rollup a flat vulnerability document is counted in."""
+    vendor = (doc.get('description') or '').strip() or 'Unknown'
+    severity = (doc.get('severity') or '').strip().lower() or 'unknown'
+    published_at = parse_published(doc.get('published_date'))
+    month = published_at.strftime('%Y-%m') if published_at else 'unknown'
+    return f'{vendor}|{severity}|{month}'
+
+
+def apply_stats(stats, deltas):
+    """Add per-key count deltas to the rollups and drop the rollups that reach zero."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    writes = []
+    for key, delta in deltas.items():
+        vendor, severity, month = key.rsplit('|', 2)
+        writes.append(UpdateOne(
+            {'_id': key},
+            {'$inc': {'count': delta}, '$setOnInsert': {'vendor': vendor, 'severity': severity, 'month': month}},
+            upsert=True
+        ))
+    stats.bulk_write(writes, ordered=False)
+    stats.delete_many({'_id': {'$in': list(deltas)}, 'count': {'$lte': 0}})
+
+
+def rebuild_stats(cves, advisories, stats, batch_size):
+    """Recount every rollup from the stored references and replace the incremental ones.
+
+    References that were never counted (stored before rollups existed) get their
+    rollup key backfilled so later ingests move them correctly. Returns the
+    number of rollups and the keys whose incremental count was wrong.
+    """
+    counts = Counter()
+    cursor = cves.find({}, {'_id': 0}).batch_size(batch_size)
+    while True:
+        batch = list(islice(cursor, batch_size))
+        if not batch:
+            break
+        backfill = []
+        for ref, doc in zip(batch, join(advisories, batch)):
+            key = stats_key(doc)
+            counts[key] += 1
+            if ref.get('stats_key') != key:
+                backfill.append(UpdateOne(
+                    {'cve_id': ref['cve_id']},
+                    {'$set': {'stats_key': key, 'published_at': parse_published(doc.get('published_date'))}}
+                ))
+        if backfill:
+            cves.bulk_write(backfill, ordered=False)
+
+    previous = {doc['_id']: doc['count'] for doc in stats.find({}, {'count': 1})}
+    mismatches = sorted(key for key in set(previous) | set(counts) if previous.get(key, 0) != counts.get(key, 0))
+    stats.delete_many({})
+    if counts:
+        stats.insert_many([
+            dict(zip(('vendor', 'severity', 'month'), key.rsplit('|', 2)), _id=key, count=count)
+            for key, count in counts.items()
+        ])
+    return len(counts), mismatches
+
+
+def stats_criteria(vendor=None, severity=None):
+    criteria = {}
+    if vendor:
+        criteria['vendor'] = vendor
+    if severity:
+        criteria['severity'] = severity.lower()
+    return criteria
+
+
+def summarize_stats(rollups):
+    """Total a list of rollups per dimension."""
+    totals = {'vendor': Counter(), 'severity': Counter(), 'month': Counter()}
+    for rollup in rollups:
+        for dimension, counter in totals.items():
+            counter[rollup[dimension]] += rollup['count']
+    return {
+        'total': sum(rollup['count'] for rollup in rollups),
+        'by_vendor': dict(sorted(totals['vendor'].items())),
+        'by_severity': dict(sorted(totals['severity'].items())),
+        'by_month': dict(sorted(totals['month'].items())),
+        'rollups': rollups,
+    }
+
+
+def read_stats(stats, vendor=None, severity=None):
+    """Return the stored rollups, optionally filtered, with totals per dimension."""
+    rollups = list(stats.find(stats_criteria(vendor, severity), {'_id': 0}).sort(STATS_SORT))
+    return summarize_stats(rollups)
+
+
+def advisory_ids(refs):
+    return list({ref['advisory_id'] for ref in refs if ref.get('advisory_id')})
+
+
+def top_severe(cves, since, limit):
+    """The highest scored CVEs published since a date, as a covered query on the top_severity index.
+
+    The index is walked in score order, dates are filtered from its keys and
+    the scan stops after `limit` matches.
+    """
+    projection = dict({'_id': 0}, **{field: 1 for field in TOP_SEVERITY_FIELDS})
+    cursor = cves.find({'cvss_score': {'$gte': 0}, 'published_at': {'$gte': since}}, projection)
+    return list(cursor.sort(TOP_SEVERITY_INDEX[:3]).hint('top_severity').limit(limit))
+
+
+def join(advisories, refs):
+    """Join a batch of CVE references with their advisories using a single query."""
+    ids = advisory_ids(refs)
+    by_id = {doc['_id']: doc for doc in advisories.find({'_id': {'$in': ids}})} if ids else {}
+    # Legacy flat documents have no advisory_id and are returned as they are
+    return [merge(ref, by_id.get(ref.get('advisory_id'))) for ref in refs]
+
+
+def iter_joined(advisories, cursor, batch_size):
+    """Join a cursor of CVE references batch by batch, keeping memory bounded."""
+    cursor = iter(cursor)
+    while True:
+        batch = list(islice(cursor, batch_size))
+        if not batch:
+            return
+        yield from join(advisories, batch)
+
+
+def search(cves, advisories, query, skip, limit):
+    """Rank CVEs by text score over their own text and their advisory's text.
+
+    Returns the requested page of matching CVEs and whether more follow it. No
+    total is counted: that would visit every match, however deep the page.
+    """
+    criteria = {'$text': {'$search': query}}
+    score = {'score': {'$meta': 'textScore'}}
+    window = skip + limit
+    # One match past the page tells whether another page follows
+    fetch = window + 1
+
+    scores = {}
+    for ref in cves.find(criteria, dict(score, cve_id=1)).sort([('score', score['score'])]).limit(fetch):
+        scores[ref['cve_id']] = ref['score']
+
+    matching_advisories = list(
+        advisories.find(criteria, score).sort([('score', score['score'])]).limit(fetch)
+    )
+    advisory_scores = {doc['_id']: doc['score'] for doc in matching_advisories}
+    if advisory_scores:
+        for ref in cves.find({'advisory_id': {'$in': list(advisory_scores)}}, {'cve_id': 1, 'advisory_id': 1}):
+            scores[ref['cve_id']] = max(scores.get(ref['cve_id'], 0), advisory_scores[ref['advisory_id']])
+
+    ranked = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))[skip:window]
+    page_ids = [cve_id for cve_id, _ in ranked]
+    docs = {doc['cve_id']: doc for doc in join(advisories, list(cves.find({'cve_id': {'$in': page_ids}}, {'_id': 0})))}
+    results = []
+    for cve_id, value in ranked:
+        if cve_id in docs:
+            results.append(dict(docs[cve_id], score=value))
+    return results, len(scores) > window
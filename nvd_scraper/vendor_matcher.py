@@ -0,0 +1,76 @@
+import re
+
+# Vendors the second scraping level has a spider for, with the names they go by
+# in NVD summaries. Matching is case-insensitive on whole words, so "word" no
+# longer hits "password" nor "mac" "machine".
+VENDOR_ALIASES = {
+    'IBM': ('ibm', 'websphere', 'db2', 'qradar', 'cognos', 'maximo', 'tivoli'),
+    'QNAP': ('qnap', 'qts', 'quts hero', 'qutscloud'),
+    'WordFence': ('wordpress', 'wordfence'),
+    'Microsoft': ('microsoft', 'windows', 'azure', 'sharepoint', 'exchange server', 'outlook', 'visual studio'),
+    'Cisco': ('cisco', 'webex', 'nx-os', 'ios xe', 'ios xr'),
+}
+
+# CPE 2.3 vendor names, and WordPress plugins whose target software is wordpress
+CPE_VENDORS = {
+    'ibm': 'IBM',
+    'qnap': 'QNAP',
+    'microsoft': 'Microsoft',
+    'cisco': 'Cisco',
+}
+CPE_TARGET_SOFTWARE = {
+    'wordpress': 'WordFence',
+}
+
+# Reference links on an NVD detail page that one of the vendor spiders can follow
+VENDOR_LINKS = ('qnap', 'ibm.com', 'cisco.com', 'wordfence', 'microsoft.com')
+
+CPE_PATTERN = re.compile(r'cpe:2\.3:[aho]:[^\s"\'<>]+')
+
+
+def is_vendor_link(link):
+    link = link.lower()
+    return any(domain in link for domain in VENDOR_LINKS)
+
+
+class VendorMatcher:
+    """Find which target vendors a CVE summary is about in a single regex pass.
+
+    All aliases are compiled into one alternation, longest first, anchored on
+    word boundaries; multi-word aliases accept any whitespace between words.
+    """
+
+    def __init__(self, aliases=VENDOR_ALIASES, cpe_vendors=CPE_VENDORS, cpe_target_software=CPE_TARGET_SOFTWARE):
+        self.vendors = {}
+        for vendor, names in aliases.items():
+            for name in names:
+                self.vendors[self.normalize(name)] = vendor
+        alternation = '|'.join(
+            r'\s+'.join(re.escape(word) for word in name.split())
+            for name in sorted(self.vendors, key=len, reverse=True)
+        )
+        self.pattern = re.compile(rf'(?<!\w)(?:{alternation})(?!\w)', re.IGNORECASE)
+        self.cpe_vendors = cpe_vendors
+        self.cpe_target_software = cpe_target_software
+
+    @staticmethod
+    def normalize(name):
+        return ' '.join(name.lower().split())
+
+    def match(self, text, cpes=()):
+        """Return the set of vendors named in the text or owning one of the CPE names."""
+        vendors = {self.vendors[self.normalize(found.group())] for found in self.pattern.finditer(text or '')}
+        for cpe in cpes:
+            parts = cpe.split(':')
+            if len(parts) > 3 and parts[3] in self.cpe_vendors:
+                vendors.add(self.cpe_vendors[parts[3]])
+            if len(parts) > 10 and parts[10] in self.cpe_target_software:
+                vendors.add(self.cpe_target_software[parts[10]])
+        return vendors
+
+    def is_relevant(self, text, cpes=()):
+        return bool(self.match(text, cpes))
+
+
+def find_cpes(text):
+    return CPE_PATTERN.findall(text or '')
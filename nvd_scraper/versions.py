@@ -0,0 +1,148 @@
+import re
+from bisect import bisect_right
+
+VERSION_PATTERN = re.compile(r'\d+(?:\.\d+)*')
+KEY_COMPONENTS = 6
+KEY_WIDTH = 10
+# Keys have a fixed length, so appending any character turns an inclusive upper
+# bound into an exclusive one; the open ends sort before and after every key.
+INCLUSIVE_SUFFIX = '~'
+LOWEST_KEY = ''
+HIGHEST_KEY = '\uffff'
+
+
+def version_key(version):
+    """Turn the first version number found in a string into a sortable fixed-width key."""
+    match = VERSION_PATTERN.search(version or '')
+    if not match:
+        return None
+    components = [int(part) for part in match.group().split('.')][:KEY_COMPONENTS]
+    components += [0] * (KEY_COMPONENTS - len(components))
+    return '.'.join(str(part).zfill(KEY_WIDTH) for part in components)
+
+
+def next_branch(version):
+    """'5.1' -> '5.2': the exclusive upper bound of a '5.1.x' wildcard."""
+    parts = VERSION_PATTERN.search(version).group().split('.')
+    parts[-1] = str(int(parts[-1]) + 1)
+    return '.'.join(parts)
+
+
+def normalize_product(product):
+    return ' '.join((product or '').lower().split())
+
+
+def version_range(vendor, product, introduced=None, fixed=None, last_affected=None):
+    """Build a structured range record; the bounds are kept as the vendor wrote them."""
+    return {
+        'vendor': vendor,
+        'product': product.strip(),
+        'introduced': introduced,
+        'fixed': fixed,
+        'last_affected': last_affected,
+    }
+
+
+def range_bounds(record):
+    """Return the [lo, hi) key interval of a range record, or None if a bound cannot be parsed."""
+    lo = version_key(record['introduced']) if record.get('introduced') else LOWEST_KEY
+    if record.get('last_affected'):
+        hi = version_key(record['last_affected'])
+        hi = hi + INCLUSIVE_SUFFIX if hi else None
+    elif record.get('fixed'):
+        hi = version_key(record['fixed'])
+    else:
+        hi = HIGHEST_KEY
+    if lo is None or hi is None:
+        return None
+    return lo, hi
+
+
+def split_product_version(text):
+    """'QTS 5.1.x' -> ('QTS', '5.1.x'): the product is everything before the first versioned token."""
+    tokens = text.split()
+    for index, token in enumerate(tokens):
+        if any(char.isdigit() for char in token):
+            return ' '.join(tokens[:index]), ' '.join(tokens[index:])
+    return text.strip(), ''
+
+
+def qnap_ranges(affected_product, fixed_version):
+    """QNAP rows look like 'QTS 5.1.x' fixed in 'QTS 5.1.7.2770 build 20240520'."""
+    product, branch = split_product_version(affected_product)
+    fixed = VERSION_PATTERN.search(fixed_version or '')
+    if not branch:
+        return []
+    introduced = VERSION_PATTERN.search(branch).group()
+    if fixed:
+        return [version_range('QNAP', product, introduced=introduced, fixed=fixed.group())]
+    if branch.endswith('.x'):
+        return [version_range('QNAP', product, introduced=introduced, fixed=next_branch(introduced))]
+    return [version_range('QNAP', product, introduced=introduced, last_affected=introduced)]
+
+
+def wordfence_ranges(software_slug, affected_versions, patched_versions):
+    """WordFence lists entries such as '<= 1.4.2', '* - 1.4.2', '1.0 - 1.4.2' or '1.4.2'."""
+    patched = sorted((v.strip() for v in patched_versions if version_key(v)), key=version_key)
+    ranges = []
+    for entry in affected_versions:
+        entry = entry.strip()
+        if not entry:
+            continue
+        introduced, last_affected, fixed = None, None, None
+        if entry.startswith('<='):
+            last_affected = entry[2:].strip()
+        elif entry.startswith('<'):
+            fixed = entry[1:].strip()
+        elif ' - ' in entry:
+            start, end = (part.strip() for part in entry.split(' - ', 1))
+            introduced = None if start == '*' else start
+            last_affected = end
+        else:
+            introduced = last_affected = entry
+        if fixed is None:
+            hi = version_key(last_affected)
+            fixed = next((v for v in patched if hi and version_key(v) > hi), None)
+        ranges.append(version_range('WordFence', software_slug, introduced, fixed, last_affected))
+    return ranges
+
+
+def firefox_ranges(fixed_in):
+    """Mozilla advisories only give the release that fixed the issue, e.g. 'Firefox 130'."""
+    fixed = VERSION_PATTERN.search(fixed_in or '')
+    return [version_range('Firefox', 'Firefox', fixed=fixed.group())] if fixed else []
+
+
+def adobe_ranges(product, versions):
+    """Adobe rows pair a product with '24.002.20991 and earlier versions' or an exact release."""
+    version = VERSION_PATTERN.search(versions or '')
+    if not version:
+        return []
+    if 'earlier' in versions.lower():
+        return [version_range('Adobe', product, last_affected=version.group())]
+    return [version_range('Adobe', product, introduced=version.group(), last_affected=version.group())]
+
+
+class IntervalIndex:
+    """Static stabbing-query index over [lo, hi) key intervals.
+
+    The sorted interval endpoints split the key space into elementary segments,
+    each holding the intervals that cover it, so a lookup is one bisection.
+    """
+
+    def __init__(self, entries):
+        # entries: iterable of (lo, hi, value)
+        entries = list(entries)
+        self.boundaries = sorted({bound for lo, hi, _ in entries for bound in (lo, hi)})
+        self.segments = [[] for _ in self.boundaries]
+        for lo, hi, value in entries:
+            start = bisect_right(self.boundaries, lo) - 1
+            end = bisect_right(self.boundaries, hi) - 1
+            for segment in range(start, end):
+                self.segments[segment].append(value)
+
+    def stab(self, key):
+        position = bisect_right(self.boundaries, key) - 1
+        if position < 0:
+            return []
+        return self.segments[position]
@@ -0,0 +1,71 @@
+from wsgiref.validate import validator
+
+import mongomock
+import mongomock.gridfs
+import pytest
+from werkzeug.test import Client
+
+import app as app_module
+from nvd_scraper.snapshot import SnapshotReader
+
+
+# GridFSBucket over mongomock databases, for the published snapshots
+mongomock.gridfs.enable_gridfs_integration()
+
+
+class MongoClient:
+    """Hands out the one in-memory server of a test, like a MongoClient(url) per call."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def __getitem__(self, name):
+        return self.server[name]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def mongo(monkeypatch, tmp_path):
+    """app.py wired to an in-memory MongoDB and an empty snapshot directory."""
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(app_module, 'MongoClient', lambda url: MongoClient(server))
+    monkeypatch.setattr(app_module, 'db_name', 'test')
+    monkeypatch.setattr(app_module, 'collection_name', 'vulnerabilities')
+    monkeypatch.setattr(app_module, 'snapshot_dir', str(tmp_path / 'snapshot'))
+    monkeypatch.setattr(app_module, 'snapshot_reader', SnapshotReader(str(tmp_path / 'snapshot')))
+    app_module.response_cache.clear()
+    app_module._generation.update(value=None, checked_at=0.0)
+    yield server['test']
+    relay = app_module._stream_relay
+    if relay['thread'] is not None:
+        relay['stop'].set()
+        relay['thread'].join()
+        relay.update(thread=None, stop=None)
+    app_module.response_cache.clear()
+    app_module._generation.update(value=None, checked_at=0.0)
+
+
+def vulnerability(cve_id, vendor='IBM', **fields):
+    doc = {
+        'cve_id': cve_id,
+        'published_date': '01/05/2024',
+        'description': vendor,
+        'org_link': f'https://{vendor.lower()}.example/advisory/{cve_id}',
+        'release_date': '01/05/2024',
+        'severity': 'High',
+        'summary': f'Summary of {cve_id}',
+        'affected_products': ['Product 1.0'],
+        'recommendations': 'Upgrade.',
+    }
+    doc.update(fields)
+    return doc
+
+
+def get(path, **kwargs):
+    # The validator enforces what real WSGI servers do, e.g. that bodies are bytes
+    response = Client(validator(app_module.app.wsgi_app)).get(path, **kwargs)
+    response.get_data()
+    response.close()
+    return response
@@ -0,0 +1,35 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.mark.parametrize('ingested', [True, False])
+def test_generation_and_snapshot_only_advance_after_a_successful_ingest(monkeypatch, tmp_path, ingested):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    monkeypatch.setattr(app_module, 'run_first_level_scraping', lambda: None)
+    monkeypatch.setattr(app_module, 'run_second_level_scraping', lambda: None)
+    monkeypatch.setattr(app_module, 'combine_json_files', lambda *files: [{'cve_id': 'CVE-1'}])
+    monkeypatch.setattr(app_module, 'insert_many_vulnerabilities', lambda docs: ingested)
+    monkeypatch.setattr(app_module, 'bump_generation', lambda: calls.append('bump_generation'))
+    monkeypatch.setattr(app_module, 'publish_snapshot', lambda: calls.append('publish_snapshot'))
+
+    assert app_module.run_full_scraper() == 1
+    assert calls == (['bump_generation', 'publish_snapshot'] if ingested else [])
+
+
+def test_response_cache_evicts_the_least_recently_used_entry():
+    cache = app_module.ResponseCache(2, 60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+
+def test_response_cache_entries_expire():
+    cache = app_module.ResponseCache(2, -1)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+    assert cache.get('missing') is None
@@ -0,0 +1,33 @@
+from conftest import vulnerability
+from nvd_scraper.broadcast import Broadcaster
+
+
+def pending(subscription):
+    docs = []
+    while not subscription.queue.empty():
+        docs.append(subscription.queue.get_nowait()['cve_id'])
+    return docs
+
+
+def test_a_full_buffer_drops_the_oldest_documents():
+    broadcaster = Broadcaster(buffer_size=2)
+    slow = broadcaster.subscribe()
+    for index in range(5):
+        broadcaster.publish(vulnerability(f'CVE-{index}'))
+
+    assert pending(slow) == ['CVE-3', 'CVE-4']
+    assert slow.dropped == 3
+
+
+def test_subscribers_only_get_matching_documents_until_they_leave():
+    broadcaster = Broadcaster(buffer_size=10)
+    qnap = broadcaster.subscribe(vendors=['QNAP'])
+    critical = broadcaster.subscribe(severities=['Critical'])
+    broadcaster.publish(vulnerability('CVE-1', 'QNAP'))
+    broadcaster.publish(vulnerability('CVE-2', severity='Critical'))
+    broadcaster.unsubscribe(qnap)
+    broadcaster.publish(vulnerability('CVE-3', 'QNAP', severity='Critical'))
+
+    assert pending(qnap) == ['CVE-1']
+    assert pending(critical) == ['CVE-2', 'CVE-3']
+
@@ -0,0 +1,27 @@
+import app as app_module
+from conftest import get, vulnerability
+from nvd_scraper import storage
+
+
+def test_changes_stop_at_the_committed_sequence(mongo):
+    assert app_module.insert_many_vulnerabilities([vulnerability('CVE-1'), vulnerability('CVE-2')])
+
+    # An ingest that reserved its block but whose unordered writes have only partly landed
+    first = storage.reserve_sequence(mongo[app_module.meta_collection_name], 2)
+    mongo['vulnerabilities'].insert_one({'cve_id': 'CVE-4', 'seq': first + 1})
+
+    response = get('/changes?since=0')
+    assert response.status_code == 200
+    assert [doc['cve_id'] for doc in response.json['changes']] == ['CVE-1', 'CVE-2']
+    assert response.json['next'] == '2'
+    assert response.json['has_more'] is False
+
+    storage.commit_sequence(mongo[app_module.meta_collection_name], first + 1)
+    app_module.bump_generation()
+    assert [doc['cve_id'] for doc in get('/changes?since=2').json['changes']] == ['CVE-4']
+
+
+def test_change_sequences_written_before_the_high_water_mark_stay_readable():
+    assert storage.committed_sequence(None) == 0
+    assert storage.committed_sequence({'_id': 'change_sequence', 'value': 7}) == 7
+    assert storage.committed_sequence({'_id': 'change_sequence', 'value': 9, 'committed': 7}) == 7
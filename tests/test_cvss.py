@@ -0,0 +1,35 @@
+import pytest
+
+from nvd_scraper import cvss
+
+
+@pytest.mark.parametrize('vector, score', [
+    ('CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H', 9.8),
+    ('CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:C/C:H/I:H/A:H', 10.0),
+    ('CVSS:3.1/AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:L/A:N', 6.1),
+    ('CVSS:3.0/AV:L/AC:L/PR:L/UI:N/S:U/C:H/I:H/A:H', 7.8),
+    ('CVSS:3.1/AV:N/AC:H/PR:H/UI:R/S:U/C:L/I:N/A:N', 2.0),
+    ('CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:N/I:N/A:N', 0.0),
+    ('CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/E:P', None),
+])
+def test_base_score(vector, score):
+    assert cvss.base_score(vector) == score
+
+
+def test_roundup_avoids_floating_point_artifacts():
+    assert cvss.roundup(4.0) == 4.0
+    assert cvss.roundup(4.000001) == 4.0
+    assert cvss.roundup(4.00001) == 4.1
+    assert cvss.roundup(4.02) == 4.1
+
+
+def test_cvss_fields_prefer_the_published_score():
+    vector = 'Base score 9.8 (CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H)'
+    assert cvss.cvss_fields('7.5 HIGH', vector) == {
+        'cvss_score': 7.5, 'cvss_vector': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H', 'severity_level': 'high'
+    }
+    assert cvss.cvss_fields(None, vector)['cvss_score'] == 9.8
+    assert cvss.cvss_fields(None, None, 'Important') == {
+        'cvss_score': None, 'cvss_vector': None, 'severity_level': 'high'
+    }
+    assert cvss.cvss_fields('n/a', None, None)['severity_level'] == 'unknown'
@@ -0,0 +1,44 @@
+import logging
+from types import SimpleNamespace
+
+import scrapy
+from scrapy.pipelines import ItemPipelineManager
+from scrapy.utils.test import get_crawler
+
+from nvd_scraper.extensions import ProfilingExtension
+
+SETTINGS = {
+    'PROFILE_ENABLED': True,
+    'PROFILE_CALLBACKS': ['parse', 'process_item'],
+    'PROFILE_SAMPLE_INTERVAL': 0.005,
+    'ITEM_PIPELINES': {'nvd_scraper.pipelines.NvdScraperPipeline': 300},
+}
+
+
+class Spider(scrapy.Spider):
+    name = 'test'
+
+    def parse(self, response):
+        return []
+
+
+def test_profiling_wraps_spider_callbacks_and_pipelines(monkeypatch, tmp_path, caplog):
+    monkeypatch.setenv('SCRAPER_PROFILE_DIR', str(tmp_path))
+    monkeypatch.setenv('SCRAPER_PROFILE_RUN', 'run')
+    crawler = get_crawler(Spider, SETTINGS)
+    itemproc = ItemPipelineManager.from_crawler(crawler)
+    crawler.engine = SimpleNamespace(scraper=SimpleNamespace(itemproc=itemproc))
+    extension = ProfilingExtension.from_crawler(crawler)
+    spider = Spider()
+
+    extension.spider_opened(spider)
+    spider.parse(None)
+    processed = []
+    itemproc.process_item({'cve_id': 'CVE-1'}, spider).addCallback(processed.append)
+    with caplog.at_level(logging.INFO, logger='nvd_scraper.extensions'):
+        extension.engine_stopped()
+
+    assert processed == [{'cve_id': 'CVE-1'}]
+    assert (tmp_path / 'run' / 'test.parse.prof').exists()
+    assert (tmp_path / 'run' / 'test.NvdScraperPipeline.process_item.prof').exists()
+    assert any(record.getMessage().startswith('[profile] test.parse: ') for record in caplog.records)
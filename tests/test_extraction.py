@@ -0,0 +1,71 @@
+import pytest
+from scrapy.http import HtmlResponse
+
+from nvd_scraper import extraction
+from nvd_scraper.extraction import Extractor, Field, Rows
+
+PAGE = b'''
+<html><body>
+  <h1 class="title"> Security Bulletin </h1>
+  <p class="date">May 21, 2024</p>
+  <div id="summary"><p>First</p><p>Second</p></div>
+  <p class="cves">CVE-2024-0001, CVE-2024-0002</p>
+  <table>
+    <tr><td>QTS 5.1.x</td><td><a href="/fix/1">QTS 5.1.7</a></td></tr>
+    <tr><td>QuTS hero</td><td></td></tr>
+  </table>
+</body></html>
+'''
+
+
+def extract(rules):
+    response = HtmlResponse('https://vendor.example/advisory', body=PAGE)
+    return Extractor(rules).extract(response)
+
+
+def test_field_rules():
+    values = extract({
+        'title': Field(css='h1.title::text', post=extraction.strip),
+        'date': Field(css='p.date::text', post=extraction.format_date),
+        'paragraphs': Field(css='#summary p::text', many=True),
+        'summary': Field(css='#summary p::text', join=' '),
+        'cves': Field(css='p.cves::text', re=r'CVE-\d{4}-\d+', many=True),
+        'first_cve': Field(css='p.cves::text', re=r'CVE-\d{4}-\d+'),
+        'html': Field(css='#summary p'),
+        'fallback': Field(css='h2::text', fallback=Field(xpath='//h1/@class')),
+        'missing': Field(css='h3::text', default='n/a'),
+    })
+    assert values == {
+        'title': 'Security Bulletin',
+        'date': '21/05/2024',
+        'paragraphs': ['First', 'Second'],
+        'summary': 'First Second',
+        'cves': ['CVE-2024-0001', 'CVE-2024-0002'],
+        'first_cve': 'CVE-2024-0001',
+        'html': '<p>First</p>',
+        'fallback': 'title',
+        'missing': 'n/a',
+    }
+
+
+def test_rows_evaluate_their_fields_relative_to_each_row():
+    values = extract({'rows': Rows(css='tr', product=Field(css='td:nth-child(1)::text'),
+                                   fixed=Field(css='a::text'), link=Field(css='a::attr(href)', default=''))})
+    assert values['rows'] == [
+        {'product': 'QTS 5.1.x', 'fixed': 'QTS 5.1.7', 'link': '/fix/1'},
+        {'product': 'QuTS hero', 'fixed': None, 'link': ''},
+    ]
+
+
+def test_rules_need_exactly_one_query():
+    with pytest.raises(ValueError):
+        Field()
+    with pytest.raises(ValueError):
+        Field(css='p', xpath='//p')
+
+
+def test_format_date_keeps_unknown_formats():
+    assert extraction.format_date('2024-05-21') == '21/05/2024'
+    assert extraction.format_date('21 May 2024') == '21/05/2024'
+    assert extraction.format_date('sometime in May') == 'sometime in May'
+    assert extraction.format_date('') is None
@@ -0,0 +1,104 @@
+import pytest
+import scrapy
+from scrapy.exceptions import DontCloseSpider
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+
+from nvd_scraper.middlewares import CircuitBreakerMiddleware, RequestDeferred
+
+SETTINGS = {
+    'CIRCUIT_BREAKER_ENABLED': True,
+    'CIRCUIT_BREAKER_THRESHOLD': 2,
+    'CIRCUIT_BREAKER_COOLDOWN': 30,
+    'CIRCUIT_BREAKER_RETRY_BUDGET': 10,
+    'CIRCUIT_BREAKER_RETRY_TIMES': 3,
+    'CIRCUIT_BREAKER_BACKOFF_BASE': 0,
+    'CIRCUIT_BREAKER_RETRY_HTTP_CODES': [503],
+}
+
+
+class Engine:
+    """Records what is rescheduled; crawl() has the signature of the pinned Scrapy 2.5."""
+
+    def __init__(self, fail=False):
+        self.crawled = []
+        self.fail = fail
+
+    def crawl(self, request, spider):
+        if self.fail:
+            raise RuntimeError('engine unavailable')
+        self.crawled.append((request, spider))
+
+
+def make_middleware(engine):
+    crawler = get_crawler(scrapy.Spider, SETTINGS)
+    crawler.engine = engine
+    return CircuitBreakerMiddleware.from_crawler(crawler), scrapy.Spider('test')
+
+
+def open_breaker(middleware, spider):
+    for index in range(SETTINGS['CIRCUIT_BREAKER_THRESHOLD']):
+        middleware.process_exception(Request(f'https://vendor.example/{index}'), ConnectionRefusedError(), spider)
+    with pytest.raises(RequestDeferred):
+        middleware.process_request(Request('https://vendor.example/a'), spider)
+    with pytest.raises(RequestDeferred):
+        middleware.process_request(Request('https://vendor.example/b'), spider)
+    _, breaker = middleware.breaker_for(Request('https://vendor.example/'))
+    return breaker
+
+
+def test_deferred_requests_are_released_and_the_spider_can_close():
+    engine = Engine()
+    middleware, spider = make_middleware(engine)
+    breaker = open_breaker(middleware, spider)
+    assert breaker.state == 'open'
+    with pytest.raises(DontCloseSpider):
+        middleware.spider_idle(spider)
+
+    # Cooldown over: one probe is let through while the host is half-open
+    breaker.opened_at -= SETTINGS['CIRCUIT_BREAKER_COOLDOWN']
+    middleware.release(spider)
+    assert breaker.state == 'half_open'
+    assert len(engine.crawled) == 1
+    probe, crawled_for = engine.crawled[0]
+    assert crawled_for is spider
+    assert probe.dont_filter
+
+    # The probe succeeds, the breaker closes and everything left is released
+    assert middleware.process_request(probe, spider) is None
+    middleware.process_response(probe, Response(probe.url, status=200), spider)
+    assert breaker.state == 'closed'
+    middleware.release(spider)
+    assert [request.url for request, _ in engine.crawled] == ['https://vendor.example/a', 'https://vendor.example/b']
+    assert not breaker.deferred
+    middleware.spider_idle(spider)
+
+
+def test_release_survives_engine_errors():
+    middleware, spider = make_middleware(Engine(fail=True))
+    breaker = open_breaker(middleware, spider)
+    breaker.state = 'closed'
+
+    middleware.release(spider)
+    assert not breaker.deferred
+    assert middleware.stats.get_value('circuit_breaker/release_errors') == 2
+    middleware.spider_idle(spider)
+
+
+def test_failed_request_is_retried_after_backoff():
+    engine = Engine()
+    middleware, spider = make_middleware(engine)
+    request = Request('https://vendor.example/page')
+    retry = middleware.process_response(request, Response(request.url, status=503), spider)
+    assert retry.meta['breaker_retry_times'] == 1
+    assert retry.dont_filter
+
+    # A retry that is not due yet is parked, then released once its backoff has passed
+    retry.meta['breaker_not_before'] += 60
+    with pytest.raises(RequestDeferred):
+        middleware.process_request(retry, spider)
+    middleware.release(spider)
+    assert engine.crawled == []
+    retry.meta['breaker_not_before'] -= 120
+    middleware.release(spider)
+    assert [request.url for request, _ in engine.crawled] == [retry.url]
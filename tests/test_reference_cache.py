@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from pymongo import errors
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from nvd_scraper import reference_cache
+from nvd_scraper.reference_cache import ReferenceCache
+from nvd_scraper.spiders.nvd_spider import NVDSpider
+
+SUMMARY = 'ibm websphere application server allows remote code execution'
+VENDOR_LINK = 'https://www.ibm.com/support/pages/node/7150000'
+SETTINGS = {
+    'MONGODB_URL': 'mongodb://cache.example',
+    'DB_NAME': 'test',
+    'NVD_REFERENCE_CACHE_ENABLED': True,
+    'NVD_REFERENCE_CACHE_COLLECTION': 'nvd_reference_cache',
+    'NVD_REFERENCE_CACHE_TTL_DAYS': 30,
+}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(reference_cache, 'MongoClient', lambda url, **kwargs: server)
+    return server
+
+
+def expire(server, cve_id):
+    server['test']['nvd_reference_cache'].update_one(
+        {'_id': cve_id}, {'$set': {'fetched_at': datetime.utcnow() - timedelta(days=31)}}
+    )
+
+
+def test_entries_are_fresh_until_they_expire_or_the_summary_changes(server):
+    cache = ReferenceCache.from_settings(get_crawler(NVDSpider, SETTINGS).settings)
+    cache.put('CVE-1', SUMMARY, 'NIST', VENDOR_LINK, etag='"v1"')
+    cache.put('CVE-2', SUMMARY, 'NIST', None)
+
+    entries = cache.get_many(['CVE-1', 'CVE-2', 'CVE-3'])
+    assert sorted(entries) == ['CVE-1', 'CVE-2']
+    assert cache.is_fresh(entries['CVE-1'], SUMMARY)
+    assert entries['CVE-2']['org_link'] is None
+    # A changed NVD description invalidates the entry outright
+    assert not cache.is_current(entries['CVE-1'], SUMMARY + ' (updated)')
+    assert not cache.is_fresh(entries['CVE-1'], SUMMARY + ' (updated)')
+
+    expire(server, 'CVE-1')
+    entry = cache.get_many(['CVE-1'])['CVE-1']
+    assert cache.is_current(entry, SUMMARY) and not cache.is_fresh(entry, SUMMARY)
+
+    # A 304 from NVD only renews the entry, keeping what was parsed before
+    cache.touch('CVE-1')
+    entry = cache.get_many(['CVE-1'])['CVE-1']
+    assert cache.is_fresh(entry, SUMMARY)
+    assert (entry['org_link'], entry['etag']) == (VENDOR_LINK, '"v1"')
+
+
+class BrokenCollection:
+    def find(self, *args, **kwargs):
+        raise errors.ServerSelectionTimeoutError('no servers')
+
+    def update_one(self, *args, **kwargs):
+        raise AssertionError('a disabled cache must not write')
+
+
+def test_the_cache_disables_itself_when_mongodb_is_unreachable(server):
+    cache = ReferenceCache(SETTINGS['MONGODB_URL'], 'test', 'nvd_reference_cache')
+    cache.collection = BrokenCollection()
+
+    assert cache.get_many(['CVE-1']) == {}
+    assert not cache.enabled
+    cache.put('CVE-1', SUMMARY, 'NIST', VENDOR_LINK)
+    cache.touch('CVE-1')
+    assert cache.get_many(['CVE-1']) == {}
+
+
+def search_page(*cve_ids):
+    rows = ''.join(
+        f'<tr><th><a data-testid="vuln-detail-link-{index}" href="/vuln/detail/{cve_id}">{cve_id}</a></th>'
+        f'<td><p data-testid="vuln-summary-{index}">{SUMMARY}</p>'
+        f'<span data-testid="vuln-published-on-{index}">May 21, 2024</span></td></tr>'
+        for index, cve_id in enumerate(cve_ids)
+    )
+    body = (f'<strong data-testid="vuln-matching-records-count">{len(cve_ids)}</strong>'
+            f'<table><tbody>{rows}</tbody></table>')
+    url = 'https://nvd.nist.gov/vuln/search/results?startIndex=0'
+    return HtmlResponse(url, body=body, encoding='utf-8', request=Request(url, meta={'start_index': 0}))
+
+
+def detail_page(request, status=200, body=''):
+    return HtmlResponse(request.url, status=status, body=body, encoding='utf-8', request=request,
+                        headers={'ETag': '"v2"'})
+
+
+def test_search_results_use_fresh_entries_and_revalidate_expired_ones(server):
+    crawler = get_crawler(NVDSpider, SETTINGS)
+    spider = NVDSpider.from_crawler(crawler)
+    spider.reference_cache.put('CVE-2024-0002', SUMMARY, 'NIST', VENDOR_LINK)
+    spider.reference_cache.put('CVE-2024-0003', SUMMARY, 'NIST', VENDOR_LINK, etag='"v1"')
+    expire(server, 'CVE-2024-0003')
+
+    requests = list(spider.parse_search_results(search_page('CVE-2024-0001', 'CVE-2024-0002', 'CVE-2024-0003')))
+
+    # The fresh entry is used as is, the others go to NVD
+    assert [result['cve_id'] for _, result in spider.results] == ['CVE-2024-0002']
+    miss, revalidate = requests
+    assert miss.meta['cve_id'] == 'CVE-2024-0001' and 'If-None-Match' not in miss.headers
+    assert revalidate.meta['cve_id'] == 'CVE-2024-0003'
+    assert revalidate.headers['If-None-Match'] == b'"v1"'
+    assert revalidate.meta['handle_httpstatus_list'] == [304]
+    assert crawler.stats.get_value('nvd_reference_cache/hit') == 1
+    assert crawler.stats.get_value('nvd_reference_cache/miss') == 1
+    assert crawler.stats.get_value('nvd_reference_cache/revalidate') == 1
+
+    # 304: the cached link is used and the entry renewed
+    spider.parse_cve_details(detail_page(revalidate, status=304))
+    entry = spider.reference_cache.get_many(['CVE-2024-0003'])['CVE-2024-0003']
+    assert spider.reference_cache.is_fresh(entry, SUMMARY)
+
+    # 200: the page is parsed and cached with its validators
+    spider.parse_cve_details(detail_page(miss, body=(
+        '<span data-testid="vuln-current-description-source">NIST</span>'
+        f'<a href="https://example.com/blog">blog</a><a href="{VENDOR_LINK}">advisory</a>'
+    )))
+    entry = spider.reference_cache.get_many(['CVE-2024-0001'])['CVE-2024-0001']
+    assert (entry['org_link'], entry['etag']) == (VENDOR_LINK, '"v2"')
+
+    assert sorted(result['cve_id'] for _, result in spider.results) == [
+        'CVE-2024-0001', 'CVE-2024-0002', 'CVE-2024-0003'
+    ]
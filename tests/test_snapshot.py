@@ -0,0 +1,89 @@
+import gzip
+import json
+
+import app as app_module
+from conftest import get, vulnerability
+from nvd_scraper.snapshot import Snapshot, SnapshotReader, write_snapshot
+
+
+def test_snapshot_slices_documents_by_vendor(tmp_path):
+    docs = [vulnerability('CVE-2', 'QNAP'), vulnerability('CVE-1', 'IBM'), vulnerability('CVE-3', 'IBM')]
+    snapshot = Snapshot(str(tmp_path), write_snapshot(str(tmp_path), docs, generation=3))
+
+    assert (len(snapshot), snapshot.generation) == (3, 3)
+    first, count = snapshot.vendor_range('IBM')
+    body = b''.join(snapshot.documents(first, count))
+    assert [doc['cve_id'] for doc in json.loads(body)] == ['CVE-1', 'CVE-3']
+    assert json.loads(bytes(snapshot.document('CVE-2')))['description'] == 'QNAP'
+    assert snapshot.document('CVE-9') is None
+    assert snapshot.vendor_range('Cisco') is None
+
+
+def test_publishing_uploads_the_snapshot_and_prunes_old_ones(mongo, tmp_path):
+    app_module.insert_many_vulnerabilities([vulnerability('CVE-1')])
+    for _ in range(4):
+        app_module.bump_generation()
+        app_module.publish_snapshot()
+
+    pointer = mongo[app_module.meta_collection_name].find_one({'_id': 'snapshot'})
+    assert pointer['generation'] == 4
+    uploads = {doc['metadata']['snapshot'] for doc in mongo['snapshots.files'].find()}
+    assert len(uploads) == 2 and pointer['name'] in uploads
+    assert len(list((tmp_path / 'snapshot').glob('vulnerabilities-*.index.json'))) == 2
+
+
+def test_other_instances_download_the_snapshot_of_the_current_generation(mongo, monkeypatch, tmp_path):
+    app_module.insert_many_vulnerabilities([vulnerability('CVE-1'), vulnerability('CVE-2', 'QNAP')])
+    app_module.publish_snapshot()
+    reader = SnapshotReader(str(tmp_path / 'reader'))
+    monkeypatch.setattr(app_module, 'snapshot_reader', reader)
+
+    assert json.loads(get('/vulnerability/CVE-2').get_data())['description'] == 'QNAP'
+    assert reader.current(0).name == mongo[app_module.meta_collection_name].find_one({'_id': 'snapshot'})['name']
+    assert (tmp_path / 'reader' / f'{reader.current(0).name}.json').exists()
+
+
+def test_reads_use_mongo_when_the_snapshot_is_behind_the_generation(mongo):
+    app_module.insert_many_vulnerabilities([vulnerability('CVE-1')])
+    app_module.publish_snapshot()
+    assert app_module.current_snapshot(app_module.current_generation()) is not None
+
+    # The next ingest bumps the generation, then fails to publish
+    app_module.insert_many_vulnerabilities([vulnerability('CVE-2', 'QNAP')])
+    app_module.bump_generation()
+    app_module._generation.update(value=None, checked_at=0.0)
+
+    assert app_module.current_snapshot(app_module.current_generation()) is None
+    response = get('/get_vulnerabilities')
+    assert sorted(doc['cve_id'] for doc in json.loads(response.get_data())) == ['CVE-1', 'CVE-2']
+    assert json.loads(get('/vulnerability/CVE-2').get_data())['description'] == 'QNAP'
+
+
+def test_snapshot_responses_are_bytes_and_negotiated(mongo):
+    app_module.insert_many_vulnerabilities([vulnerability(f'CVE-{i}', vendor) for i, vendor in
+                                            enumerate(['IBM', 'QNAP', 'IBM'] * 10)])
+    app_module.publish_snapshot()
+
+    response = get('/get_vulnerabilities?vendor=IBM')
+    assert response.status_code == 200
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert len(json.loads(response.get_data())) == 20
+
+    compressed = get('/get_vulnerabilities', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(compressed.get_data()))) == 30
+
+    etag = compressed.headers['ETag']
+    cached = get('/get_vulnerabilities', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert cached.status_code == 304
+
+    document = get('/vulnerability/CVE-1')
+    assert json.loads(document.get_data())['description'] == 'QNAP'
+    assert get('/vulnerability/CVE-99').status_code == 404
+
+
+def test_reads_fall_back_to_mongo_without_a_snapshot(mongo):
+    app_module.insert_many_vulnerabilities([vulnerability('CVE-1'), vulnerability('CVE-2', 'QNAP')])
+    response = get('/get_vulnerabilities?vendor=QNAP')
+    assert [doc['cve_id'] for doc in json.loads(response.get_data())] == ['CVE-2']
+    assert json.loads(get('/vulnerability/CVE-1').get_data())['cve_id'] == 'CVE-1'
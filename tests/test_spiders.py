@@ -0,0 +1,40 @@
+import pytest
+from scrapy.http import Request
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
+
+from nvd_scraper.middlewares import RequestDeferred
+from nvd_scraper.spiders.base import VendorSpider
+from nvd_scraper.spiders.ibm import IBMVulnerabilitySpider
+
+
+def test_a_vendor_spider_without_build_items_fails_when_defined():
+    with pytest.raises(TypeError, match='build_items'):
+        class IncompleteSpider(VendorSpider):
+            name = 'incomplete'
+
+
+def failure(exception, url):
+    result = Failure(exception)
+    result.request = Request(url)
+    return result
+
+
+def test_errback_counts_deferred_requests_apart_from_failures():
+    crawler = get_crawler(IBMVulnerabilitySpider)
+    spider = IBMVulnerabilitySpider.from_crawler(crawler)
+
+    spider.errback_httpbin(failure(RequestDeferred(), 'https://www.ibm.com/support/pages/node/1'))
+    spider.errback_httpbin(failure(ConnectionRefusedError(), 'https://www.ibm.com/support/pages/node/2'))
+
+    assert crawler.stats.get_value('vendor/requests_deferred') == 1
+    assert crawler.stats.get_value('vendor/requests_failed') == 1
+
+
+def test_the_nvd_spider_is_rate_limited():
+    from nvd_scraper.spiders.nvd_spider import NVDSpider
+
+    settings = get_crawler(NVDSpider).settings
+    assert settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN') == 2
+    assert settings.getfloat('DOWNLOAD_DELAY') == 1
+    assert settings.getbool('AUTOTHROTTLE_ENABLED')
@@ -0,0 +1,107 @@
+import mongomock
+
+from conftest import vulnerability
+from nvd_scraper import storage
+
+
+def collections():
+    db = mongomock.MongoClient()['test']
+    return db['vulnerabilities'], db['advisories'], db['ranges'], db['meta'], db['stats']
+
+
+def test_a_cve_repeated_in_a_batch_is_written_and_counted_once():
+    cves, advisories, ranges, meta, stats = collections()
+    batch = [
+        vulnerability('CVE-1', severity='Low'),
+        vulnerability('CVE-2'),
+        vulnerability('CVE-1', severity='Critical'),
+    ]
+
+    _, written = storage.ingest(cves, advisories, ranges, meta, stats, batch)
+
+    assert sorted(doc['cve_id'] for doc in written) == ['CVE-1', 'CVE-2']
+    assert cves.count_documents({}) == 2
+    assert cves.find_one({'cve_id': 'CVE-1'})['severity'] == 'Critical'
+    assert sorted(doc['seq'] for doc in cves.find()) == [1, 2]
+    assert storage.read_stats(stats)['total'] == cves.count_documents({})
+
+
+def test_normalize_splits_advisories_from_per_cve_overrides():
+    link = 'https://helpx.adobe.com/security/products/acrobat/apsb24-07.html'
+    shared = {'org_link': link, 'summary': 'Acrobat and Reader updates'}
+    advisories, refs = storage.normalize([
+        vulnerability('CVE-1', 'Adobe', severity='Critical', cvss_score=9.8, **shared),
+        vulnerability('CVE-2', 'Adobe', severity='Important', **shared),
+        vulnerability('CVE-3', org_link=''),
+    ])
+
+    assert list(advisories) == [storage.advisory_id(link)]
+    assert advisories[storage.advisory_id(link)]['severity'] == 'Critical'
+    assert refs == [
+        {'cve_id': 'CVE-1', 'advisory_id': storage.advisory_id(link), 'cvss_score': 9.8},
+        {'cve_id': 'CVE-2', 'advisory_id': storage.advisory_id(link), 'severity': 'Important'},
+    ]
+
+
+def test_ingest_writes_only_changes_and_moves_their_rollups():
+    cves, advisories, ranges, meta, stats = collections()
+    batch = [vulnerability('CVE-1'), vulnerability('CVE-2', 'QNAP')]
+
+    assert len(storage.ingest(cves, advisories, ranges, meta, stats, batch)[1]) == 2
+    assert storage.ingest(cves, advisories, ranges, meta, stats, batch) == (0, [])
+
+    batch[1]['severity'] = 'Low'
+    _, written = storage.ingest(cves, advisories, ranges, meta, stats, batch)
+    assert [doc['cve_id'] for doc in written] == ['CVE-2']
+    assert cves.find_one({'cve_id': 'CVE-2'})['seq'] == 3
+    assert storage.committed_sequence(meta.find_one({'_id': 'change_sequence'})) == 3
+
+    summary = storage.read_stats(stats)
+    assert summary['by_vendor'] == {'IBM': 1, 'QNAP': 1}
+    assert summary['by_severity'] == {'high': 1, 'low': 1}
+    assert summary['by_month'] == {'2024-05': 2}
+    assert storage.rebuild_stats(cves, advisories, stats, 10) == (2, [])
+
+
+def test_join_rebuilds_the_flat_documents():
+    cves, advisories, ranges, meta, stats = collections()
+    scraped = vulnerability('CVE-1', affected_products=['QTS 5.1'])
+    storage.ingest(cves, advisories, ranges, meta, stats, [scraped])
+
+    doc, = storage.join(advisories, list(cves.find({}, {'_id': 0})))
+    assert {field: doc[field] for field in scraped} == scraped
+
+
+def test_an_advisory_update_re_stamps_the_references_missing_from_the_batch():
+    cves, advisories, ranges, meta, stats = collections()
+    link = 'https://www.ibm.com/support/pages/node/1'
+    storage.ingest(cves, advisories, ranges, meta, stats, [
+        vulnerability('CVE-1', org_link=link, summary='WebSphere fixes'),
+        vulnerability('CVE-2', org_link=link, summary='WebSphere fixes'),
+    ])
+
+    _, written = storage.ingest(cves, advisories, ranges, meta, stats, [
+        vulnerability('CVE-1', org_link=link, summary='WebSphere fixes', severity='Critical'),
+    ])
+
+    assert sorted(doc['cve_id'] for doc in written) == ['CVE-1', 'CVE-2']
+    sibling = cves.find_one({'cve_id': 'CVE-2'})
+    assert sibling['seq'] == 4
+    assert storage.join(advisories, [sibling])[0]['severity'] == 'Critical'
+    changes = cves.find({'seq': {'$gt': 2}}).sort('seq', 1)
+    assert [doc['cve_id'] for doc in changes] == ['CVE-1', 'CVE-2']
+
+
+def test_an_advisory_update_moves_the_rollups_of_references_missing_from_the_batch():
+    cves, advisories, ranges, meta, stats = collections()
+    link = 'https://www.ibm.com/support/pages/node/1'
+    storage.ingest(cves, advisories, ranges, meta, stats, [
+        vulnerability('CVE-1', org_link=link, summary='WebSphere fixes'),
+        vulnerability('CVE-2', org_link=link, summary='WebSphere fixes'),
+    ])
+    storage.ingest(cves, advisories, ranges, meta, stats, [
+        vulnerability('CVE-1', org_link=link, summary='WebSphere fixes', severity='Critical'),
+    ])
+
+    assert storage.read_stats(stats)['by_severity'] == {'critical': 2}
+    assert storage.rebuild_stats(cves, advisories, stats, 10)[1] == []
@@ -0,0 +1,39 @@
+import json
+import time
+
+from werkzeug.test import Client
+
+import app as app_module
+from conftest import vulnerability
+
+
+def next_event(chunks):
+    for chunk in chunks:
+        if chunk.startswith(b'id:'):
+            fields = dict(line.split(': ', 1) for line in chunk.decode('utf-8').strip().split('\n'))
+            return fields['event'], json.loads(fields['data'])
+    return None
+
+
+def test_stream_delivers_documents_ingested_by_another_process(mongo, monkeypatch):
+    monkeypatch.setattr(app_module, 'STREAM_POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(app_module, 'STREAM_HEARTBEAT', 0.05)
+    app_module.insert_many_vulnerabilities([vulnerability('CVE-0', 'QNAP')])
+
+    response = Client(app_module.app).get('/stream?vendor=QNAP', buffered=False)
+    try:
+        assert response.mimetype == 'text/event-stream'
+        chunks = response.iter_encoded()
+        assert next(chunks) == b': connected\n\n'
+        # Let this worker's relay find the head of the change feed, which CVE-0 is behind
+        time.sleep(0.2)
+
+        # The scraper runs in its own process and only shares MongoDB with the workers
+        app_module.insert_many_vulnerabilities([vulnerability('CVE-1', 'IBM'), vulnerability('CVE-2', 'QNAP')])
+
+        event, doc = next_event(chunks)
+        assert event == 'vulnerability'
+        assert (doc['cve_id'], doc['description'], doc['seq']) == ('CVE-2', 'QNAP', 3)
+    finally:
+        response.close()
+    assert not app_module.broadcaster._subscribers
@@ -0,0 +1,18 @@
+from nvd_scraper.vendor_matcher import VendorMatcher, find_cpes
+
+
+def test_aliases_match_whole_words_only():
+    matcher = VendorMatcher()
+    assert matcher.match('A flaw in Microsoft Windows allows elevation of privilege') == {'Microsoft'}
+    assert matcher.match('Weak password hashing in a machine learning library') == set()
+    assert matcher.match('IBMX and QTSx are not vendors') == set()
+    assert matcher.match('QNAP QuTS  hero and Cisco IOS\nXE are affected') == {'QNAP', 'Cisco'}
+    assert not matcher.is_relevant('')
+
+
+def test_cpe_names_add_their_vendor_or_target_software():
+    matcher = VendorMatcher()
+    text = 'cpe:2.3:a:ibm:db2:11.5:*:*:*:*:*:*:* and cpe:2.3:a:acme:forms:1.0:*:*:*:*:wordpress:*:*'
+    cpes = find_cpes(text)
+    assert len(cpes) == 2
+    assert matcher.match('A plugin flaw', cpes) == {'IBM', 'WordFence'}
@@ -0,0 +1,54 @@
+from nvd_scraper import versions
+from nvd_scraper.versions import IntervalIndex, range_bounds, version_key
+
+
+def covers(record, version):
+    lo, hi = range_bounds(record)
+    return lo <= version_key(version) < hi
+
+
+def test_version_keys_sort_numerically():
+    assert version_key('1.10') > version_key('1.9.9')
+    assert version_key('QTS 5.1.7.2770 build 20240520') == version_key('5.1.7.2770')
+    assert version_key('1.2') == version_key('1.2.0')
+    assert version_key('latest') is None
+
+
+def test_range_bounds_treat_fixed_as_exclusive_and_last_affected_as_inclusive():
+    fixed = versions.version_range('QNAP', 'QTS', introduced='5.1', fixed='5.1.7')
+    assert covers(fixed, '5.1') and covers(fixed, '5.1.6.9')
+    assert not covers(fixed, '5.1.7') and not covers(fixed, '5.0.9')
+
+    last_affected = versions.version_range('WordFence', 'plugin', last_affected='1.4.2')
+    assert covers(last_affected, '0.1') and covers(last_affected, '1.4.2')
+    assert not covers(last_affected, '1.4.3')
+
+    assert range_bounds(versions.version_range('Adobe', 'Acrobat', fixed='n/a')) is None
+
+
+def test_vendor_range_parsers():
+    assert versions.qnap_ranges('QTS 5.1.x', '') == [
+        versions.version_range('QNAP', 'QTS', introduced='5.1', fixed='5.2')
+    ]
+    assert versions.qnap_ranges('QuTS hero h5.1.x', 'QuTS hero h5.1.7.2770')[0]['fixed'] == '5.1.7.2770'
+
+    ranges = versions.wordfence_ranges('contact-form', ['<= 1.4.2', '2.0 - 2.1'], ['1.4.3', '2.1.1'])
+    assert [(r['introduced'], r['last_affected'], r['fixed']) for r in ranges] == [
+        (None, '1.4.2', '1.4.3'), ('2.0', '2.1', '2.1.1')
+    ]
+
+    assert versions.adobe_ranges('Acrobat', '24.002.20991 and earlier versions')[0]['last_affected'] == '24.002.20991'
+    assert versions.firefox_ranges('Firefox 130')[0]['fixed'] == '130'
+
+
+def test_interval_index_stabs_every_covering_interval():
+    index = IntervalIndex([
+        (version_key('1.0'), version_key('2.0'), 'a'),
+        (version_key('1.5'), version_key('3.0'), 'b'),
+        (versions.LOWEST_KEY, version_key('1.2'), 'c'),
+    ])
+    assert sorted(index.stab(version_key('1.1'))) == ['a', 'c']
+    assert sorted(index.stab(version_key('1.5'))) == ['a', 'b']
+    assert index.stab(version_key('2.0')) == ['b']
+    assert index.stab(version_key('3.0')) == []
+    assert IntervalIndex([]).stab(version_key('1.0')) == []